@@ -0,0 +1,73 @@
+import os
+import numpy as np
+from agents.rl_agent import RLAgent
+from agents.tile_agent import TileCodingAgent
+from simulation.array_file import save_arrays, load_arrays
+from simulation.metrics import RewardMetrics
+
+# For every kind of agent: its class, the arrays that hold what it learned, and
+# the constructor parameters needed to rebuild it
+AGENT_STATE = {
+    "RLAgent": (RLAgent, ("q_table",),
+                ("pos_bins", "vel_bins", "angle_bins", "learning_rate", "discount", "epsilon_decay")),
+    "TileCodingAgent": (TileCodingAgent, ("weights",),
+                        ("tiles", "tilings", "memory_size", "candidates", "learning_rate", "epsilon_decay")),
+}
+
+
+def save_checkpoint(path, agent, metrics=None, **metadata):
+    """
+    Saves the state of an agent (what it learned and its exploration rate) and the
+    RewardMetrics of its episodes to a binary array file. The file is replaced
+    atomically, so an interruption during a save keeps the previous checkpoint.
+    """
+
+    kind = type(agent).__name__
+    if kind not in AGENT_STATE:
+        raise ValueError(f"Cannot checkpoint agents of type {kind}")
+    _, arrays, params = AGENT_STATE[kind]
+
+    metric_arrays, metric_values = (metrics if metrics is not None else RewardMetrics()).state()
+    state = {name: getattr(agent, name) for name in arrays}
+    state.update({f"metrics_{name}": array for name, array in metric_arrays.items()})
+    save_arrays(path, state, {
+        "agent": kind,
+        "params": {name: np.asarray(getattr(agent, name)).tolist() for name in params},
+        "epsilon": float(agent.epsilon),
+        "metrics": metric_values,
+        **metadata,
+    })
+
+
+def load_checkpoint(path, mmap=True, seed=None):
+    """
+    Rebuilds the agent saved with save_checkpoint (warm start). Returns the agent
+    and its RewardMetrics. With mmap, the learned arrays are memory-mapped
+    copy-on-write: large tables load instantly, pages are read when first used,
+    and training never modifies the file.
+    """
+
+    arrays, metadata = load_arrays(path, mmap_mode="c" if mmap else None)
+    agent_class, names, _ = AGENT_STATE[metadata["agent"]]
+
+    params = {name: tuple(value) if isinstance(value, list) else value for name, value in metadata["params"].items()}
+    agent = agent_class(**params, epsilon=metadata["epsilon"], seed=seed)
+    for name in names:
+        setattr(agent, name, arrays[name])
+
+    metric_arrays = {name[len("metrics_"):]: array for name, array in arrays.items() if name.startswith("metrics_")}
+    metrics = RewardMetrics.from_state(metric_arrays, metadata["metrics"])
+    return agent, metrics
+
+
+def load_or_create(path, create, mmap=False, seed=None):
+    """
+    The agent and metrics of the checkpoint at path if it exists (resuming an
+    interrupted run), or a new agent from create() and empty metrics. The
+    checkpoint is read into memory by default: the caller saves to the same path,
+    and a file cannot be replaced while it is memory-mapped on every platform.
+    """
+
+    if path is not None and os.path.exists(path):
+        return load_checkpoint(path, mmap=mmap, seed=seed)
+    return create(), RewardMetrics()
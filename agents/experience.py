@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class ExperienceBuffer:
+    """
+    Ring buffer of the most recent experiences of an agent: each one is the action
+    taken, as a (px_bin, py_bin, v_bin, a_bin) row (the state and the decision),
+    and the reward it got. Storage is preallocated, so adding never allocates.
+    """
+
+    def __init__(self, capacity=65536, action_size=4):
+        self.actions = np.zeros((capacity, action_size), dtype=np.int32)
+        self.rewards = np.zeros(capacity)
+        self.count = 0 # Total experiences added (also the next write position)
+
+    @property
+    def capacity(self):
+        return len(self.rewards)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def add(self, actions, rewards):
+        """
+        Adds the rows of 'actions' with their rewards. If there are more than the
+        capacity, only the last ones are kept.
+        """
+
+        actions = np.asarray(actions).reshape(-1, self.actions.shape[1])[-self.capacity:]
+        rewards = np.asarray(rewards, dtype=float).reshape(-1)[-self.capacity:]
+        n = len(rewards)
+
+        positions = (self.count + np.arange(n)) % self.capacity
+        self.actions[positions] = actions
+        self.rewards[positions] = rewards
+        self.count += n
+
+    def append(self, action, reward):
+        """
+        Adds a single experience (faster than add for one row).
+        """
+
+        position = self.count % self.capacity
+        self.actions[position] = action
+        self.rewards[position] = reward
+        self.count += 1
+
+    def recent(self, n):
+        """
+        The last n experiences added (actions and rewards), oldest first.
+        """
+
+        n = min(n, len(self))
+        positions = (self.count - n + np.arange(n)) % self.capacity
+        return self.actions[positions], self.rewards[positions]
+
+    def sample(self, n, rng):
+        """
+        n experiences drawn uniformly (with replacement) from the buffer.
+        """
+
+        positions = rng.integers(0, len(self), n)
+        return self.actions[positions], self.rewards[positions]
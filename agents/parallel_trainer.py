@@ -0,0 +1,186 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from agents.rl_agent import RLAgent
+from simulation.batch_environment import BatchAgentEnvironment
+from simulation.metrics import RewardMetrics
+
+
+def _worker_loop(connection, agent_params, lanes, agent_seed, env_seed, predict_outcomes):
+    """
+    Worker process: owns a batched environment and a local copy of the agent.
+    For each request it loads the shared Q-table and epsilon, trains for the
+    requested number of episodes and sends back its Q-table changes and rewards.
+    """
+
+    agent = RLAgent(**agent_params, seed=agent_seed)
+    env = BatchAgentEnvironment(agent, lanes=lanes, seed=env_seed, predict_outcomes=predict_outcomes)
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        q_table, epsilon, episodes = message
+        agent.q_table[:] = q_table
+        agent.epsilon = epsilon
+
+        rewards = env.run(episodes)
+        connection.send((agent.q_table - q_table, rewards.astype(np.int8)))
+
+    connection.close()
+
+
+class ParallelTrainer:
+    """
+    Trains one RLAgent with episodes simulated across several worker processes.
+
+    Every worker runs its own batched environment with a local copy of the agent.
+    Training advances in rounds: each worker receives the current Q-table and
+    epsilon, trains for a number of episodes, and returns how it changed the
+    Q-table. The changes are merged into the shared agent (averaged over the
+    workers that updated each entry) before the next round.
+
+    With a seed, every worker gets its own seed derived from it, so runs with the
+    same seed and number of workers are reproducible.
+    """
+
+    def __init__(self, agent=None, workers=None, lanes=256, sync_episodes=2000, seed=None, predict_outcomes=False,
+                 metrics=None):
+        self.agent = agent if agent is not None else RLAgent()
+        self.metrics = metrics if metrics is not None else RewardMetrics() # Statistics of all finished episodes
+        self.workers = workers or os.cpu_count() or 1
+        self.lanes = lanes # Episodes simulated at once by each worker
+        self.sync_episodes = sync_episodes # Episodes per worker between merges
+        self.seed = seed
+        self.predict_outcomes = predict_outcomes # Skip episodes decided by their initial orbit
+
+        self.processes = []
+        self.connections = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+
+        agent_params = {
+            "pos_bins": self.agent.pos_bins,
+            "vel_bins": self.agent.vel_bins,
+            "angle_bins": self.agent.angle_bins,
+            "learning_rate": self.agent.learning_rate,
+            "discount": self.agent.discount,
+            "epsilon_decay": self.agent.epsilon_decay,
+            "batch_size": self.agent.batch_size,
+            "replay_samples": self.agent.replay_samples,
+        }
+        seeds = np.random.SeedSequence(self.seed).spawn(self.workers)
+
+        for worker_seed in seeds:
+            agent_seed, env_seed = worker_seed.generate_state(2)
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker_loop,
+                args=(child, agent_params, self.lanes, int(agent_seed), int(env_seed), self.predict_outcomes),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self.processes.append(process)
+            self.connections.append(parent)
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self.connections = []
+
+    def train(self, episodes):
+        """
+        Trains for at least the given number of episodes and returns how many
+        finished. Their rewards are added to the metrics (grouped by round and worker).
+        """
+
+        if not self.processes:
+            self.start()
+
+        finished = 0
+        while finished < episodes:
+            per_worker = min(self.sync_episodes, math.ceil((episodes - finished) / self.workers))
+            for connection in self.connections:
+                connection.send((self.agent.q_table, self.agent.epsilon, per_worker))
+            results = [connection.recv() for connection in self.connections]
+
+            # Merge: average the changes of the workers that updated each entry
+            deltas = np.stack([delta for delta, _ in results])
+            updates = np.count_nonzero(deltas, axis=0)
+            self.agent.q_table += deltas.sum(axis=0) / np.maximum(updates, 1)
+
+            new_episodes = 0
+            for _, worker_rewards in results:
+                self.metrics.add_batch(worker_rewards)
+                new_episodes += len(worker_rewards)
+            finished += new_episodes
+
+            # Exploration decays as if all episodes had been run by one agent
+            self.agent.epsilon = max(0.01, self.agent.epsilon * self.agent.epsilon_decay ** new_episodes)
+
+        return finished
+
+
+def benchmark_scaling(worker_counts, episodes, lanes=256, seed=0):
+    """
+    Measures training throughput (episodes per second) for each number of workers.
+    """
+
+    results = []
+    for workers in worker_counts:
+        with ParallelTrainer(RLAgent(), workers=workers, lanes=lanes, seed=seed) as trainer:
+            start = time.perf_counter()
+            finished = trainer.train(episodes)
+            elapsed = time.perf_counter() - start
+
+        results.append({
+            "workers": workers,
+            "episodes": finished,
+            "seconds": elapsed,
+            "episodes_per_second": finished / elapsed,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python -m agents.parallel_trainer --workers 1,2,4,8 --episodes 100000
+    parser = argparse.ArgumentParser(description="Training throughput as the number of worker processes grows.")
+    parser.add_argument("--workers", default=",".join(str(2 ** i) for i in range(int(math.log2(os.cpu_count() or 1)) + 1)),
+                        help="comma separated worker counts")
+    parser.add_argument("--episodes", type=int, default=100000)
+    parser.add_argument("--lanes", type=int, default=256)
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = benchmark_scaling([int(w) for w in args.workers.split(",")], args.episodes, lanes=args.lanes)
+    print(f"{'workers':>8} {'episodes':>10} {'seconds':>8} {'episodes/s':>11}")
+    for row in results:
+        print(f"{row['workers']:>8} {row['episodes']:>10} {row['seconds']:>8.2f} {row['episodes_per_second']:>11.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
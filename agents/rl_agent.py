@@ -1,6 +1,6 @@
 import numpy as np
-import random
 import math
+from agents.experience import ExperienceBuffer
 
 class RLAgent:
     """
@@ -8,7 +8,8 @@ class RLAgent:
     velocity and angle combinations based on received rewards.
     """
 
-    def __init__(self, pos_bins=10, vel_bins=10, angle_bins=12, learning_rate=0.1, discount=0.95, epsilon=1.0, epsilon_decay=0.995):
+    def __init__(self, pos_bins=10, vel_bins=10, angle_bins=12, learning_rate=0.1, discount=0.95, epsilon=1.0, epsilon_decay=0.995, seed=None,
+                 batch_size=1, replay_samples=0, replay_capacity=65536):
         self.vel_bins = vel_bins # 10 possible velocity values
         self.angle_bins = angle_bins # 12 possible angle values
         self.pos_bins = pos_bins  # 10 possible planet's initial positions (for x and y)
@@ -29,42 +30,155 @@ class RLAgent:
         self.last_action = None
         self.last_state = None
 
+        self.rng = np.random.default_rng(seed) # Random generator for all decisions
+        self._uniforms = np.empty(0) # Pre-generated random numbers for single decisions
+        self._next_uniform = 0
+
+        # Experiences are learned in batches of 'batch_size' (1 = right away) and kept for replay:
+        # after each batch, 'replay_samples' past experiences are learned again
+        if batch_size > replay_capacity:
+            raise ValueError("batch_size cannot exceed replay_capacity (pending experiences are kept in the buffer)")
+        self.batch_size = batch_size
+        self.replay_samples = replay_samples
+        self.experience = ExperienceBuffer(replay_capacity)
+        self.pending = 0 # Experiences stored but not learned yet
+
     def select_action(self, dx, dy):
         """
         Chooses a velocity and angle either randomly (exploration) or via the Q-table (exploitation).
         """
 
         px_bin, py_bin = self.discretize_position(dx, dy)
+        explore, v_random, a_random = self._random_numbers(3)
 
-
-        if random.random() < self.epsilon:
+        if explore < self.epsilon:
             # Explore new tries
-            v_bin = random.randint(0, self.vel_bins - 1)
-            a_bin = random.randint(0, self.angle_bins - 1)
+            v_bin = int(v_random * self.vel_bins)
+            a_bin = int(a_random * self.angle_bins)
         else:
-            # Exploit with known tries (if exist in that position)
-            q_values = self.q_table[px_bin, py_bin]
-            idx = np.unravel_index(np.argmax(q_values), q_values.shape) # Get best known try parameters
-            v_bin, a_bin = idx # Use best known try parameters
+            # Exploit with known tries (if exist in that position): best (velocity, angle) of the flat row
+            v_bin, a_bin = divmod(int(np.argmax(self.q_table[px_bin, py_bin])), self.angle_bins)
 
         self.last_action = (px_bin, py_bin, v_bin, a_bin)
         return self._bin_to_action(v_bin, a_bin)
 
+    def select_action_batch(self, dx, dy):
+        """
+        Batch version of select_action: chooses a velocity and angle for each of the
+        positions in the arrays dx and dy. Returns the arrays of velocities and angles,
+        and the chosen actions (px_bin, py_bin, v_bin, a_bin) as rows of an (N, 4) array.
+        """
+
+        px_bin, py_bin = self.discretize_position_batch(dx, dy)
+        n = len(px_bin)
+
+        # Exploit with known tries: best (velocity, angle) of each position
+        q_values = self.q_table[px_bin, py_bin].reshape(n, -1)
+        v_bin, a_bin = np.divmod(np.argmax(q_values, axis=1), self.angle_bins)
+
+        # Explore new tries
+        explore = self.rng.random(n) < self.epsilon
+        v_bin[explore] = self.rng.integers(0, self.vel_bins, explore.sum())
+        a_bin[explore] = self.rng.integers(0, self.angle_bins, explore.sum())
+
+        actions = np.stack((px_bin, py_bin, v_bin, a_bin), axis=1)
+        velocity, angle = self._bin_to_action(v_bin, a_bin)
+        return velocity, angle, actions
+
     def give_feedback(self, reward):
         """
         Updates the Q-table based on the outcome of the last action.
         """
-        px_bin, py_bin, v_bin, a_bin = self.last_action
-        current_q = self.q_table[px_bin, py_bin, v_bin, a_bin]
-        max_future_q = np.max(self.q_table[px_bin, py_bin])
+        if self.batch_size > 1 or self.replay_samples:
+            self.give_feedback_batch([self.last_action], [reward])
+            return
+
+        # Single update without the array machinery of learn_batch (same rule as a batch of one)
+        self.experience.append(self.last_action, reward)
+        px_bin, py_bin = self.last_action[:2]
+        current_q = self.q_table[self.last_action]
+        target = reward + self.discount * self.q_table[px_bin, py_bin].max()
+        self.q_table[self.last_action] = current_q + self.learning_rate * (target - current_q)
+        self.epsilon = max(0.01, self.epsilon * self.epsilon_decay)
+
+    def give_feedback_batch(self, actions, rewards):
+        """
+        Batch version of give_feedback: records the outcome of each action (rows of
+        the array returned by select_action_batch) and learns from the recorded
+        experiences once at least 'batch_size' are pending (then replays
+        'replay_samples' past ones).
+        """
+        if self.pending + len(rewards) < self.batch_size:
+            self.experience.add(actions, rewards)
+            self.pending += len(rewards)
+            return
+
+        # The new experiences are learned from the arguments, as there may be more than
+        # the buffer holds (the pending ones always fit, since batch_size <= capacity)
+        if self.pending:
+            pending_actions, pending_rewards = self.experience.recent(self.pending)
+            self.experience.add(actions, rewards)
+            actions = np.concatenate((pending_actions, np.asarray(actions).reshape(-1, 4)))
+            rewards = np.concatenate((pending_rewards, np.asarray(rewards, dtype=float).reshape(-1)))
+        else:
+            self.experience.add(actions, rewards)
+        self.learn_batch(actions, rewards)
+        self.pending = 0
+        if self.replay_samples:
+            self.replay(self.replay_samples)
+
+    def replay(self, samples):
+        """
+        Learns again from experiences drawn at random from the recent history
+        (experience replay). Exploration is not reduced by replayed experiences.
+        """
+        if len(self.experience):
+            self.learn_batch(*self.experience.sample(samples, self.rng), decay=False)
 
-        # Q-learning update rule. 
-        new_q = (1 - self.learning_rate) * current_q + self.learning_rate * (reward + self.discount * max_future_q)
-        self.q_table[px_bin, py_bin, v_bin, a_bin] = new_q
+    def learn_batch(self, actions, rewards, decay=True):
+        """
+        Q-learning update for a batch of actions and their rewards, all at once.
+
+        Targets (reward + discount * best value of the state) are computed from the
+        Q-table before the batch. An entry updated k times in the batch moves
+        towards the mean of its targets as much as k single updates would
+        (1 - (1 - learning_rate)^k of the way), so a batch of one is exactly the
+        single-update rule and repeated actions do not overshoot.
+        """
+        actions = np.asarray(actions).reshape(-1, 4)
+        rewards = np.asarray(rewards, dtype=float).reshape(-1)
+        if len(rewards) == 0:
+            return
+
+        q_values = self.q_table.reshape(-1)
+        entries = np.ravel_multi_index(tuple(actions.T), self.q_table.shape)
+        decisions = self.vel_bins * self.angle_bins
+        best = self.q_table.reshape(-1, decisions)[entries // decisions].max(axis=1)
+        targets = rewards + self.discount * best
+
+        if len(entries) == 1:
+            q_values[entries] += self.learning_rate * (targets - q_values[entries])
+        else:
+            # Scatter: number of updates and sum of targets of every entry
+            updated, inverse, counts = np.unique(entries, return_inverse=True, return_counts=True)
+            mean_targets = np.bincount(inverse.ravel(), weights=targets) / counts
+            rate = 1 - (1 - self.learning_rate) ** counts
+            q_values[updated] += rate * (mean_targets - q_values[updated])
 
-        # Reduce exploration with each try
-        self.epsilon *= self.epsilon_decay
-        self.epsilon = max(0.01, self.epsilon) # Never go fully greedy
+        # Reduce exploration with each try (never fully greedy)
+        if decay:
+            self.epsilon = max(0.01, self.epsilon * self.epsilon_decay ** len(rewards))
+
+    def _random_numbers(self, count):
+        """
+        The next 'count' random numbers in [0, 1), taken from blocks generated in advance.
+        """
+        if self._next_uniform + count > len(self._uniforms):
+            self._uniforms = self.rng.random(3 * 1024)
+            self._next_uniform = 0
+        start = self._next_uniform
+        self._next_uniform += count
+        return self._uniforms[start:self._next_uniform]
 
     def _bin_to_action(self, v_bin, a_bin):
         """
@@ -96,3 +210,18 @@ class RLAgent:
 
         return px_bin, py_bin
 
+    def discretize_position_batch(self, dx, dy):
+        """
+        Batch version of discretize_position for arrays of positions.
+        """
+        min_val, max_val = self.pos_range
+        bin_size = (max_val - min_val) / self.pos_bins
+
+        px_bin = ((np.asarray(dx) - min_val) / bin_size).astype(int)
+        py_bin = ((np.asarray(dy) - min_val) / bin_size).astype(int)
+
+        # Clamp values
+        np.clip(px_bin, 0, self.pos_bins - 1, out=px_bin)
+        np.clip(py_bin, 0, self.pos_bins - 1, out=py_bin)
+
+        return px_bin, py_bin
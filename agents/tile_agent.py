@@ -0,0 +1,181 @@
+import numpy as np
+import math
+
+# Large odd constants that mix the tile coordinates into a single hash
+HASH_PRIMES = np.array([0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F, 0x165667B1], dtype=np.uint64)
+
+
+class TileCodingAgent:
+    """
+    A launch agent with continuous velocity and angle, whose action values are
+    approximated with hashed tile coding instead of stored in a dense table.
+
+    The value of launching from (dx, dy) with a velocity and angle is the sum of one
+    weight per tiling: each tiling splits the 4-D space (dx, dy, velocity, angle)
+    into tiles, shifted by a different offset in every tiling, and the tile that
+    contains the launch is hashed into a fixed weight array. Memory is 'memory_size'
+    weights whatever the resolution, and nearby launches share weights, so what is
+    learned from one launch generalizes to similar ones.
+
+    It has the same interface as RLAgent (select_action/give_feedback and their
+    batch versions). Actions are rows (dx, dy, velocity, angle) of floats.
+    """
+
+    def __init__(self, tiles=(10, 10, 16, 32), tilings=8, memory_size=2 ** 20, candidates=(16, 32),
+                 learning_rate=0.1, epsilon=1.0, epsilon_decay=0.995, seed=None):
+        self.tiles = np.array(tiles) # Tiles per dimension (dx, dy, velocity, angle) in each tiling
+        self.tilings = tilings # Number of shifted tilings (effective resolution is tilings times finer)
+        self.memory_size = memory_size # Number of weights (bounded memory)
+        self.candidates = candidates # Velocities x angles compared when exploiting
+
+        self.learning_rate = learning_rate # Importance of new tries
+        self.epsilon = epsilon # % of random tries
+        self.epsilon_decay = epsilon_decay # Reduces epsilon value after each try
+
+        # Action space ranges
+        self.vel_range = (0.5, 5.0)  # min and max velocity
+        self.angle_range = (0.0, 2 * math.pi) # min and max angle
+        self.pos_range = (-300, 300) # min and max planet's initial position
+
+        self.weights = np.zeros(memory_size)
+
+        # Dimensions (dx, dy, velocity, angle): ranges, and whether they wrap around
+        self.low = np.array([self.pos_range[0], self.pos_range[0], self.vel_range[0], self.angle_range[0]])
+        self.high = np.array([self.pos_range[1], self.pos_range[1], self.vel_range[1], self.angle_range[1]])
+        self.periodic = np.array([False, False, False, True])
+
+        # Offset of every tiling in each dimension (in tiles): asymmetric, so tilings do not line up
+        self.offsets = (np.arange(tilings)[:, None] * np.array([1, 3, 5, 7]) / tilings) % 1
+        self.tiling_keys = np.arange(tilings, dtype=np.uint64) * HASH_PRIMES[0] # Hash part of the tiling number
+
+        self.last_action = None
+        self.rng = np.random.default_rng(seed) # Random generator for all decisions
+
+    def select_action(self, dx, dy):
+        """
+        Chooses a velocity and angle either randomly (exploration) or as the best of
+        the candidate actions (exploitation).
+        """
+
+        velocity, angle, actions = self.select_action_batch([dx], [dy])
+        self.last_action = actions[0]
+        return float(velocity[0]), float(angle[0])
+
+    def select_action_batch(self, dx, dy):
+        """
+        Batch version of select_action for the positions in the arrays dx and dy.
+        Returns the arrays of velocities and angles, and the chosen actions as rows
+        (dx, dy, velocity, angle) of an (N, 4) array.
+        """
+
+        dx = np.asarray(dx, dtype=float)
+        dy = np.asarray(dy, dtype=float)
+        n = len(dx)
+
+        # Explore new tries
+        explore = self.rng.random(n) < self.epsilon
+        velocity = self.rng.uniform(*self.vel_range, n)
+        angle = self.rng.uniform(*self.angle_range, n)
+
+        # Exploit: the best of a grid of candidates, shifted at random so any action can be chosen
+        exploit = np.flatnonzero(~explore)
+        if len(exploit):
+            velocities, angles = self._candidate_grid()
+
+            # The hash of a tile combines the parts of its dimensions (see _hash_part)
+            launches = self._hash_part(np.column_stack((dx[exploit], dy[exploit])), 0) ^ self.tiling_keys
+            grid = self._hash_part(velocities[:, None], 2)[:, None, :] ^ self._hash_part(angles[:, None], 3)[None, :, :]
+            hashed = launches[:, None, :] ^ grid.reshape(1, -1, self.tilings)
+            values = self.weights[self._finish_hash(hashed)].sum(axis=2)
+
+            v_best, a_best = np.divmod(np.argmax(values, axis=1), len(angles))
+            velocity[exploit] = velocities[v_best]
+            angle[exploit] = angles[a_best]
+
+        return velocity, angle, np.column_stack((dx, dy, velocity, angle))
+
+    def give_feedback(self, reward):
+        """
+        Updates the weights based on the outcome of the last action.
+        """
+        self.give_feedback_batch([self.last_action], [reward])
+
+    def give_feedback_batch(self, actions, rewards):
+        """
+        Batch version of give_feedback for rows of the array returned by
+        select_action_batch. An episode is a single launch, so the value of an
+        action moves towards its reward.
+        """
+        actions = np.asarray(actions, dtype=float).reshape(-1, 4)
+        rewards = np.asarray(rewards, dtype=float).reshape(-1)
+        if len(rewards) == 0:
+            return
+
+        # Errors are computed before the batch; each tiling gets its share of the step
+        features = self.features(actions)
+        errors = rewards - self.weights[features].sum(axis=1)
+        np.add.at(self.weights, features, (self.learning_rate / self.tilings) * errors[:, None])
+
+        # Reduce exploration with each try
+        self.epsilon = max(0.01, self.epsilon * self.epsilon_decay ** len(rewards))
+
+    def values(self, actions):
+        """
+        Estimated value of each action (rows (dx, dy, velocity, angle)).
+        """
+        return self.weights[self.features(actions)].sum(axis=1)
+
+    def features(self, actions):
+        """
+        Weight index of the active tile of every tiling, for each action: an
+        (N, tilings) array.
+        """
+
+        actions = np.asarray(actions, dtype=float)
+        hashed = self._hash_part(actions[:, :2], 0) ^ self._hash_part(actions[:, 2:], 2) ^ self.tiling_keys
+        return self._finish_hash(hashed)
+
+    def _hash_part(self, values, first):
+        """
+        Hash of the tile coordinates of the columns of 'values' (dimensions 'first',
+        'first' + 1, ...) in every tiling: an (N, tilings) array. The hash of a
+        tile XORs the parts of all its dimensions, so the parts can be computed
+        separately and combined.
+        """
+
+        dims = slice(first, first + values.shape[1])
+
+        # Position in tiles along every dimension; angles wrap around
+        scaled = (values - self.low[dims]) / (self.high[dims] - self.low[dims])
+        scaled = np.where(self.periodic[dims], scaled % 1, np.clip(scaled, 0, 1)) * self.tiles[dims]
+
+        hashed = np.zeros((len(values), self.tilings), dtype=np.uint64)
+        for column, dim in enumerate(range(first, first + values.shape[1])):
+            # Tile coordinate in each tiling: (N, tilings)
+            coords = np.floor(scaled[:, column, None] + self.offsets[:, dim]).astype(np.int64)
+            if self.periodic[dim]:
+                coords %= self.tiles[dim]
+            hashed ^= coords.astype(np.uint64) * HASH_PRIMES[dim + 1]
+        return hashed
+
+    def _finish_hash(self, hashed):
+        """
+        Mixes combined tile hashes and maps them to weight indices.
+        """
+        hashed = hashed ^ (hashed >> np.uint64(29))
+        return (hashed % np.uint64(self.memory_size)).astype(np.intp)
+
+    def _candidate_grid(self):
+        """
+        Velocities and angles of the candidate actions (every velocity with every
+        angle): a regular grid moved by a random fraction of its spacing.
+        """
+
+        v_count, a_count = self.candidates
+        v_min, v_max = self.vel_range
+        a_min, a_max = self.angle_range
+        shift = self.rng.random(2)
+
+        velocities = v_min + (v_max - v_min) * (np.arange(v_count) + shift[0]) / v_count
+        angles = a_min + (a_max - a_min) * (np.arange(a_count) + shift[1]) / a_count
+        return velocities, angles
@@ -0,0 +1,85 @@
+import argparse
+import json
+import sys
+import time
+from benchmarks.harness import environment
+from benchmarks.physics import run_physics
+from benchmarks.training import run_training
+
+SUITES = ("gravity", "collisions", "integration", "training")
+
+
+def print_row(row):
+    if "skipped" in row:
+        result = f"skipped ({row['skipped']})"
+    else:
+        result = f"{row['seconds_per_call'] * 1000:>12.3f} ms {row['per_second']:>14.1f}/s"
+    print(f"{row['suite']:<12} {row['engine']:<22} {row['size']:>8}  {result}")
+
+
+def compare(rows, baseline_path, tolerance):
+    """
+    Rows that got slower than in a previous results file by more than 'tolerance'
+    (relative). Returns (row, previous seconds per call) pairs.
+    """
+
+    with open(baseline_path) as f:
+        previous = {(row["suite"], row["engine"], row["size"]): row for row in json.load(f)["results"]}
+
+    regressions = []
+    for row in rows:
+        old = previous.get((row["suite"], row["engine"], row["size"]))
+        if old is None or "seconds_per_call" not in old or "seconds_per_call" not in row:
+            continue
+        if row["seconds_per_call"] > old["seconds_per_call"] * (1 + tolerance):
+            regressions.append((row, old["seconds_per_call"]))
+    return regressions
+
+
+def main():
+    # Usage: python -m benchmarks --sizes 10,100,1000,10000,100000 --output benchmark_results.json
+    parser = argparse.ArgumentParser(description="StellarSim performance benchmarks (headless, fixed seeds).")
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma separated suites to run")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="comma separated numbers of bodies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-seconds", type=float, default=5.0,
+                        help="skip sizes predicted to take longer than this per step")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent measuring each case")
+    parser.add_argument("--episodes", type=int, default=20, help="episodes of the one-at-a-time training case")
+    parser.add_argument("--batched-episodes", type=int, default=20000, help="episodes of the batched training cases")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--compare", default=None, metavar="FILE",
+                        help="previous results file: exit with an error if any case got slower")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown allowed by --compare")
+    args = parser.parse_args()
+
+    suites = args.suites.split(",")
+    sizes = [int(n) for n in args.sizes.split(",")]
+
+    start = time.time()
+    rows = run_physics(suites, sizes, seed=args.seed, max_seconds=args.max_seconds, min_time=args.min_time,
+                       report=print_row)
+    if "training" in suites:
+        rows += run_training(args.episodes, args.batched_episodes, seed=args.seed, report=print_row)
+
+    results = {
+        "environment": environment(),
+        "settings": {"suites": suites, "sizes": sizes, "seed": args.seed, "max_seconds": args.max_seconds,
+                     "min_time": args.min_time, "started": start},
+        "results": rows,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        regressions = compare(rows, args.compare, args.tolerance)
+        for row, old in regressions:
+            print(f"Regression: {row['suite']} {row['engine']} {row['size']}: "
+                  f"{old * 1000:.3f} ms -> {row['seconds_per_call'] * 1000:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
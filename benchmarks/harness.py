@@ -0,0 +1,77 @@
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+
+def measure(function, min_time=0.2, max_repeats=1000, reset=None):
+    """
+    Calls function() repeatedly (at least once, then until 'min_time' seconds
+    have passed or 'max_repeats' calls were made). Returns the median and best
+    time per call and the number of calls. reset(), if given, runs untimed
+    before every call (e.g. to restore the state the call modifies).
+    """
+
+    times = []
+    total = 0.0
+    while not times or (total < min_time and len(times) < max_repeats):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+
+    return {
+        "seconds_per_call": float(np.median(times)),
+        "best_seconds": float(min(times)),
+        "calls": len(times),
+    }
+
+
+class SizeSweep:
+    """
+    Runs one benchmark over increasing numbers of bodies, skipping the sizes whose
+    time per call is predicted (from the largest size measured so far and the
+    complexity of the engine) to exceed 'max_seconds'.
+    """
+
+    def __init__(self, exponent, max_seconds=5.0):
+        self.exponent = exponent # Cost grows as bodies ** exponent
+        self.max_seconds = max_seconds
+        self.last = None # (bodies, seconds per call) of the largest size measured
+
+    def run(self, bodies, setup, min_time=0.2):
+        """
+        Benchmarks the function returned by setup(bodies), or the (function, reset)
+        pair it returns for benchmarks that need their state restored before each
+        call. Returns the measurement, or the reason it was skipped.
+        """
+
+        if self.last is not None:
+            last_bodies, last_seconds = self.last
+            estimate = last_seconds * (bodies / last_bodies) ** self.exponent
+            if estimate > self.max_seconds:
+                return {"skipped": f"estimated {estimate:.0f}s per call"}
+
+        function = setup(bodies)
+        function, reset = function if isinstance(function, tuple) else (function, None)
+        result = measure(function, min_time=min_time, reset=reset)
+        self.last = (bodies, result["seconds_per_call"])
+        return result
+
+
+def environment():
+    """
+    Description of the machine and versions the benchmarks ran with.
+    """
+
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
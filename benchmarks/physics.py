@@ -0,0 +1,182 @@
+import math
+from simulation.collisions import collision_removals
+from simulation.integrators import INTEGRATORS, make_integrator
+from simulation.physics import calculate_gravity_accelerations
+from simulation.barnes_hut import calculate_barnes_hut_accelerations
+from simulation.backend import numba_kernels
+from simulation.scenes import generate_scene
+from simulation.config import *
+from benchmarks.harness import SizeSweep
+
+# Cost of each gravity solver as a power of the number of bodies (to skip hopeless sizes)
+SOLVER_EXPONENTS = {"direct": 2, "barnes_hut": 1.2}
+
+
+class BaselineBody:
+    """
+    Copy of the original Body (plain attributes, one object per body), so the
+    baseline loops are timed as they ran before bodies became views of
+    SystemState arrays.
+    """
+
+    def __init__(self, x, y, radius, mass):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.mass = mass
+        self.ax = 0
+        self.ay = 0
+
+    def apply_gravity(self, others):
+        total_ax = 0
+        total_ay = 0
+
+        for other in others:
+            if other is self:
+                continue
+
+            dx = other.x - self.x
+            dy = other.y - self.y
+            distance = math.hypot(dx, dy)
+
+            if distance == 0:
+                continue
+
+            force = G * self.mass * other.mass / distance**2
+            ax = force * (dx/distance) / self.mass
+            ay = force * (dy/distance) / self.mass
+
+            total_ax += ax
+            total_ay += ay
+
+        self.ax = total_ax
+        self.ay = total_ay
+
+    def is_colliding(self, other):
+        dx = self.x - other.x
+        dy = self.y - other.y
+        distance = math.hypot(dx,dy)
+        return distance <= (self.radius + other.radius)
+
+
+def baseline_bodies(system):
+    """
+    BaselineBody objects (with Python floats) for the bodies of a SystemState.
+    """
+
+    return [BaselineBody(x, y, radius, mass) for (x, y), radius, mass
+            in zip(system.positions.tolist(), system.radii.tolist(), system.masses.tolist())]
+
+
+def setup_baseline_gravity(n, seed):
+    """
+    The original per-body loop: Body.apply_gravity over every other body.
+    """
+
+    bodies = baseline_bodies(generate_scene("cluster", n, seed=seed))
+
+    def run():
+        for body in bodies:
+            body.apply_gravity(bodies)
+    return run
+
+
+def setup_direct_gravity(n, seed):
+    system = generate_scene("cluster", n, seed=seed)
+    return lambda: calculate_gravity_accelerations(G, system.positions, system.masses, out=system.accelerations)
+
+
+def setup_barnes_hut_gravity(n, seed):
+    system = generate_scene("cluster", n, seed=seed)
+    return lambda: calculate_barnes_hut_accelerations(G, system.positions, system.masses, BARNES_HUT_THETA,
+                                                      out=system.accelerations)
+
+
+def setup_numba_gravity(n, seed):
+    system = generate_scene("cluster", n, seed=seed)
+    return lambda: numba_kernels.gravity_accelerations(G, system.positions, system.masses, system.accelerations)
+
+
+def setup_baseline_collisions(n, seed):
+    """
+    The original collision check: Body.is_colliding on every pair.
+    """
+
+    bodies = baseline_bodies(generate_scene("disk", n, seed=seed))
+
+    def run():
+        for i, body in enumerate(bodies):
+            for other in bodies[i + 1:]:
+                body.is_colliding(other)
+    return run
+
+
+def setup_grid_collisions(backend):
+    def setup(n, seed):
+        system = generate_scene("disk", n, seed=seed)
+        return lambda: collision_removals(system.positions, system.radii, system.serials, backend)
+    return setup
+
+
+def setup_integration(integrator, solver, backend="numpy"):
+    def setup(n, seed):
+        system = generate_scene("cluster", n, seed=seed)
+        system.gravity_solver = solver
+        system.backend = backend
+        positions = system.positions.copy()
+        velocities = system.velocities.copy()
+
+        def reset():
+            # Every call steps the same initial cluster (with a fresh integrator), so the
+            # cost does not drift as the cluster evolves
+            system.positions[:] = positions
+            system.velocities[:] = velocities
+            system.integrator = make_integrator(integrator)
+            system.forces_stale = True
+
+        return lambda: system.step(TIMESTEP), reset
+    return setup
+
+
+def benchmarks():
+    """
+    Every physics benchmark: (suite, engine, complexity exponent, setup(n, seed)).
+    """
+
+    yield "gravity", "baseline", 2, setup_baseline_gravity
+    yield "gravity", "direct", 2, setup_direct_gravity
+    yield "gravity", "barnes_hut", 1.2, setup_barnes_hut_gravity
+    if numba_kernels is not None:
+        yield "gravity", "numba", 2, setup_numba_gravity
+    yield "collisions", "baseline", 2, setup_baseline_collisions
+    yield "collisions", "grid", 1, setup_grid_collisions("numpy")
+    if numba_kernels is not None:
+        yield "collisions", "grid/numba", 1, setup_grid_collisions("numba")
+    for integrator in INTEGRATORS:
+        for solver, exponent in SOLVER_EXPONENTS.items():
+            yield "integration", f"{integrator}/{solver}", exponent, setup_integration(integrator, solver)
+        if numba_kernels is not None:
+            yield "integration", f"{integrator}/direct/numba", 2, setup_integration(integrator, "direct", "numba")
+
+
+def run_physics(suites, sizes, seed=0, max_seconds=5.0, min_time=0.2, report=print):
+    """
+    Runs the physics benchmarks of the given suites for every number of bodies.
+    Returns one row per (suite, engine, bodies) with its time per step (or the
+    reason it was skipped). Each row is also passed to 'report' as it finishes.
+    """
+
+    rows = []
+    for suite, engine, exponent, setup in benchmarks():
+        if suite not in suites:
+            continue
+
+        sweep = SizeSweep(exponent, max_seconds)
+        for n in sizes:
+            result = sweep.run(n, lambda bodies: setup(bodies, seed), min_time=min_time)
+            row = {"suite": suite, "engine": engine, "size": n, **result}
+            if "seconds_per_call" in row:
+                row["per_second"] = 1 / row["seconds_per_call"]
+            rows.append(row)
+            report(row)
+    return rows
@@ -0,0 +1,53 @@
+import random
+import time
+import numpy as np
+from agents.rl_agent import RLAgent
+from simulation.agent_environment import AgentSimulation
+from simulation.batch_environment import BatchAgentEnvironment
+
+
+def run_single(episodes, seed):
+    """
+    Experimental mode simulation, one episode at a time, headless.
+    """
+
+    random.seed(seed)
+    np.random.seed(seed)
+    sim = AgentSimulation(headless=True, agent=RLAgent(seed=seed), checkpoint=None)
+    sim.train(episodes)
+    return sim.metrics.episodes
+
+
+def run_batched(episodes, seed, lanes=1024, predict_outcomes=False):
+    """
+    Episodes simulated in lockstep lanes.
+    """
+
+    random.seed(seed)
+    env = BatchAgentEnvironment(RLAgent(seed=seed), lanes=lanes, seed=seed, predict_outcomes=predict_outcomes)
+    env.run(episodes)
+    return env.metrics.episodes
+
+
+def run_training(single_episodes=20, batched_episodes=20000, seed=0, report=print):
+    """
+    Training throughput (episodes per second) of each way of running episodes.
+    """
+
+    cases = (
+        ("single", lambda: run_single(single_episodes, seed)),
+        ("batched", lambda: run_batched(batched_episodes, seed)),
+        ("batched/predict", lambda: run_batched(batched_episodes, seed, predict_outcomes=True)),
+    )
+
+    rows = []
+    for engine, run in cases:
+        start = time.perf_counter()
+        episodes = run()
+        elapsed = time.perf_counter() - start
+
+        row = {"suite": "training", "engine": engine, "size": episodes,
+               "seconds_per_call": elapsed / episodes, "per_second": episodes / elapsed}
+        rows.append(row)
+        report(row)
+    return rows
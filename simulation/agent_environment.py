@@ -3,9 +3,25 @@ import sys
 import random
 import math
 from simulation.body import Body
+from simulation.system import SystemState
+from simulation.orbit_predictor import OutcomeCache, UNCERTAIN
+from simulation.profiler import FrameProfiler
+from simulation.metrics import RewardMetrics
+from simulation.scheduler import FixedStepScheduler, interpolate_positions
+from simulation.trajectory import TrajectoryRecorder
+from ui.interface import draw_profiler, draw_controls, text_cache
+from ui.renderer import BodyRenderer
 from simulation.config import *
 from simulation.physics import *
 from agents.rl_agent import RLAgent
+from agents.checkpoint import save_checkpoint, load_or_create
+
+AGENT_CONTROLS_TEXT = (
+    "Controls:",
+    "",
+    "+/- = Change speed",
+    "P = Profiler",
+)
 
 
 class AgentSimulation:
@@ -14,60 +30,151 @@ class AgentSimulation:
     in a stable orbit around a central sun. Failed attempts reset automatically.
     """
 
-    def __init__(self):
-        pygame.init()
-        self.window = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("StellarSim - Experimental Mode")
+    def __init__(self, headless=False, predict_outcomes=False, record=None, agent=None, checkpoint=CHECKPOINT_FILE):
+        self.headless = headless # Headless: no window, no frame limiter (training)
+        self.verbose = not headless
+        self.window = None
+        if not headless:
+            self.open_window()
 
-        self.total_rewards = [] # Global history of all episode outcomes
-        self.recent_rewards = [] # Rolling window for UI
+        self.metrics = RewardMetrics() # Statistics of all episode outcomes
         self.recent_window_size = 15 # How many results to show in interface
 
         self.clock = pygame.time.Clock()
         self.running = True
         self.timestep = TIMESTEP
 
+        # Physics steps run at their own rate (the speed keys change it); rendering interpolates
+        self.scheduler = FixedStepScheduler()
+        self.previous_positions = None
+
         self.episode = 0
         self.episode_duration = 0
         self.episode_max_time = 20 * 60  # 20 seconds at 60 FPS
 
-        self.agent = RLAgent() # Simultion agent
+        # Simultion agent: the given one, or warm-started from the checkpoint file if it exists
+        self.checkpoint = checkpoint
+        if agent is not None:
+            self.agent = agent
+        else:
+            self.agent, self.metrics = load_or_create(checkpoint, RLAgent)
+
+        # Per-phase frame timings
+        self.show_profiler = False
+        self.profiler = FrameProfiler(enabled=PROFILER_FILE is not None)
+        self.renderer = BodyRenderer()
+
+        # Optional early termination of episodes whose outcome is certain from the start
+        self.outcome_cache = OutcomeCache(self.agent) if predict_outcomes else None
+        self.predicted_reward = None
+
+        # Optional recording of every step, labeled with the episode number (file path in 'record')
+        self.recorder = TrajectoryRecorder(record, self.timestep) if record is not None else None
 
         self.update_episode_max_duration()
         self.reset_episode()
 
+    def open_window(self):
+        """
+        Initializes pygame and opens the simulation window.
+        """
+
+        pygame.init()
+        self.window = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("StellarSim - Experimental Mode")
+
     def reset_episode(self):
         """
         Resets the simulation environment: places a sun in the center,
         and allows the agent to launch a new planet (with random parameters)
         """
-        self.sun = Body(WIDTH / 2, HEIGHT / 2, 20, YELLOW, 2000, 0, 0)
-        self.bodies = [self.sun]
+        self.sun = Body(WIDTH / 2, HEIGHT / 2, SUN_RADIUS, YELLOW, SUN_MASS, 0, 0)
+        self.bodies = SystemState([self.sun])
 
         # Agent decision based on his knowledge
-        start_x, start_y = random_position_around(self.sun, 300)
+        start_x, start_y = random_position_around(self.sun, LAUNCH_DISTANCE)
         dx = start_x - self.sun.x
         dy = start_y - self.sun.y
-        planet = Body(start_x, start_y, 5, BLUE, 1, 0, 0)
+        planet = Body(start_x, start_y, PLANET_RADIUS, BLUE, PLANET_MASS, 0, 0)
 
         velocity, angle = self.agent.select_action(dx, dy)
         planet.vx = velocity * math.cos(angle)
         planet.vy = velocity * math.sin(angle)
 
         self.bodies.append(planet)
+        self.previous_positions = None
         self.episode_duration = 0
         self.episode += 1
 
+        # If the initial orbit already decides the outcome, there is no need to simulate it
+        self.predicted_reward = None
+        if self.outcome_cache is not None:
+            outcome = self.outcome_cache.predict([self.agent.last_action], dx, dy, planet.vx, planet.vy,
+                                                 self.episode_max_time * self.timestep, self.timestep)[0]
+            if outcome != UNCERTAIN:
+                self.predicted_reward = int(outcome)
+
     def run(self):
         while self.running:
-            self.clock.tick(60)
-            self.handle_events()
-            self.update()
-            self.render()
-
+            elapsed = self.clock.tick(60) / 1000
+            with self.profiler.frame():
+                with self.profiler.phase("events"):
+                    self.handle_events()
+                self.scheduler.advance(elapsed, self.update)
+                self.render()
+
+        if PROFILER_FILE is not None:
+            self.profiler.export(PROFILER_FILE)
+        self.close_recorder()
+        self.save_checkpoint()
         pygame.quit()
         sys.exit()
 
+    def run_episode(self, render=False):
+        """
+        Simulates the current episode until it is over and returns its reward.
+        Without render, physics steps run as fast as possible with no window and
+        no frame limiter. With render, the episode is shown at 60 FPS.
+        """
+
+        episode = self.episode
+        while self.episode == episode and self.running:
+            if render:
+                self.clock.tick(60)
+                self.handle_events()
+            self.update()
+            if render:
+                self.render()
+
+        return self.metrics.last if self.metrics.last is not None else 0
+
+    def train(self, episodes, render_every=0):
+        """
+        Runs the given number of episodes. If render_every is K > 0, one episode
+        out of every K is shown in a window (opened when first needed).
+        """
+
+        for number in range(1, episodes + 1):
+            render = render_every > 0 and number % render_every == 0
+            if render and self.window is None:
+                self.open_window()
+
+            self.run_episode(render=render)
+            if not self.running:
+                break
+
+    def save_checkpoint(self):
+        """
+        Saves the agent and the reward statistics to the checkpoint file (if any).
+        """
+        if self.checkpoint is not None:
+            save_checkpoint(self.checkpoint, self.agent, self.metrics)
+
+    def close_recorder(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -78,28 +185,43 @@ class AgentSimulation:
 
                 # Simulation control keys
                 if event.key == pygame.K_PLUS:
-                    self.timestep = round(self.timestep + 0.2,2)
-                    self.update_episode_max_duration()
-                    print(f"Simulation speed: {self.timestep}")
-                elif event.key == pygame.K_MINUS and self.timestep > 0.2:
-                    self.timestep = round(self.timestep - 0.2,2)
-                    self.update_episode_max_duration()
-                    print(f"Simulation speed: {self.timestep}")
+                    self.change_speed(0.2)
+                elif event.key == pygame.K_MINUS:
+                    self.change_speed(-0.2)
+                elif event.key == pygame.K_p:
+                    self.show_profiler = not self.show_profiler
+                    self.profiler.enabled = self.show_profiler or PROFILER_FILE is not None
+
+    def change_speed(self, change):
+        """
+        Changes the simulation speed (relative to normal speed) by running more or
+        fewer physics steps per second. Speed never goes below 0.2.
+        """
+
+        speed = self.scheduler.steps_per_second / PHYSICS_RATE
+        speed = round(max(0.2, speed + change), 2)
+        self.scheduler.steps_per_second = speed * PHYSICS_RATE
+        print(f"Simulation speed: x{speed}")
 
     def update(self):
         if not self.bodies:
             return
 
-        for body in self.bodies:
-            body.apply_gravity(self.bodies)
-            body.movement(self.timestep)
+        if self.predicted_reward is None:
+            self.previous_positions = self.bodies.positions.copy()
+            with self.profiler.phase("physics"):
+                self.bodies.step(self.timestep)
+            if self.recorder is not None:
+                self.recorder.record(self.bodies, label=self.episode)
 
-        self.episode_duration += 1
+            self.episode_duration += 1
 
-        if self.episode_over():
-            print(f"Episode {self.episode} ended")
-            self.evaluate_episode()
-            self.reset_episode()
+        if self.predicted_reward is not None or self.episode_over():
+            with self.profiler.phase("episode_end"):
+                if self.verbose:
+                    print(f"Episode {self.episode} ended")
+                self.evaluate_episode(self.predicted_reward)
+                self.reset_episode()
 
     def episode_over(self):
         """
@@ -119,54 +241,49 @@ class AgentSimulation:
         return False
 
     def render(self):
-        self.window.fill(BLACK)
-        for body in self.bodies:
-            body.draw(self.window)
-
-        self.draw_episode_info()
-        pygame.display.flip()
+        with self.profiler.phase("draw_bodies"):
+            self.window.fill(BLACK)
+            positions = interpolate_positions(self.previous_positions, self.bodies.positions, self.scheduler.alpha)
+            self.renderer.draw(self.window, positions, self.bodies.radii, self.bodies.colors)
+
+        with self.profiler.phase("draw_ui"):
+            self.draw_episode_info()
+            if self.show_profiler:
+                draw_profiler(self.window, self.profiler)
+        with self.profiler.phase("flip"):
+            pygame.display.flip()
 
     def draw_episode_info(self):
-        font = pygame.font.SysFont("consolas", 18)
-
         y = 10
         spacing = 25
 
         def draw_line(text):
             nonlocal y
-            label = font.render(text, True, WHITE)
-            self.window.blit(label, (10, y))
+            # These lines only change once per episode, so their surfaces are cached
+            self.window.blit(text_cache.render(text), (10, y))
             y += spacing
 
         draw_line(f"Episode: {self.episode}")
 
-        if self.total_rewards:
-            total_successes = sum(1 for r in self.total_rewards if r == 1)
-            success_rate = total_successes / len(self.total_rewards) * 100
-            draw_line(f"Global success rate: {success_rate:.1f}%")
+        if self.metrics.episodes:
+            draw_line(f"Global success rate: {self.metrics.success_rate() * 100:.1f}%")
+            window = min(self.metrics.episodes, self.metrics.window)
+            draw_line(f"Last {window} episodes: {self.metrics.window_success_rate() * 100:.1f}%")
 
-        if self.recent_rewards:
-            last_results = ''.join([':) ' if r == 1 else ':( ' for r in self.recent_rewards])
+            last_results = ''.join([':) ' if r == 1 else ':( ' for r in self.metrics.recent(self.recent_window_size)])
             draw_line(f"Recent episodes: {last_results}")
 
         # Controls panel
-        controls_y = 10
-        controls_text = [
-            "Controls:",
-            "",
-            "+/- = Change speed",
-        ]
-
-        for line in controls_text:
-            control_label = font.render(line, True, WHITE)
-            self.window.blit(control_label, (780, controls_y))
-            controls_y += 25
+        draw_controls(self.window, AGENT_CONTROLS_TEXT)
 
-    def evaluate_episode(self):
+    def evaluate_episode(self, reward=None):
         """
-        Calculates the reward for the last episode and updates the agent.
+        Calculates the reward for the last episode (unless it is already known)
+        and updates the agent.
         """
-        if len(self.bodies) < 2:
+        if reward is not None:
+            pass # Outcome predicted at launch
+        elif len(self.bodies) < 2:
             reward = -1  # Planet destroyed or not created
         else:
             planet = self.bodies[1]
@@ -182,11 +299,9 @@ class AgentSimulation:
         self.agent.give_feedback(reward)
 
         # Track reward
-        self.total_rewards.append(reward)
-
-        self.recent_rewards.append(reward)
-        if len(self.recent_rewards) > self.recent_window_size:
-            self.recent_rewards.pop(0)
+        self.metrics.add(reward)
+        if self.metrics.episodes % CHECKPOINT_EPISODES == 0:
+            self.save_checkpoint()
     
     def update_episode_max_duration(self):
         """
@@ -194,7 +309,7 @@ class AgentSimulation:
         Ensures the simulation always runs for 20 seconds of simulated time.
         """
         fps = 60
-        sim_seconds = 20
+        sim_seconds = EPISODE_SECONDS
 
         # Total frames needed = total simulated seconds / timestep * fps
         self.episode_max_time = int((sim_seconds / self.timestep) * fps)
@@ -0,0 +1,95 @@
+import json
+import os
+import numpy as np
+
+# Binary layout:
+#   8 bytes   magic
+#   8 bytes   header length (little endian)
+#   header    JSON: version, metadata, and dtype, shape and offset of every array
+#   arrays    raw data of each array (C order), each starting at a multiple of ALIGNMENT
+# Arrays can be memory-mapped straight from the file, with no parsing or copying.
+MAGIC = b"STELLAR\0"
+VERSION = 1
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_arrays(path, arrays, metadata=None):
+    """
+    Saves a dict of named arrays (and optional JSON-serializable metadata) to a file.
+    The file is written next to its destination and then renamed over it, so an
+    interrupted save never leaves a partially written file behind.
+    """
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # The header size depends on the offsets, which depend on the header size
+    header_size = 0
+    while True:
+        offset = _aligned(16 + header_size)
+        entries = {}
+        for name, array in arrays.items():
+            entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({"version": VERSION, "metadata": metadata or {}, "arrays": entries}).encode()
+        if len(header) <= header_size:
+            break
+        header_size = len(header)
+    header = header.ljust(header_size)
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(entries[name]["offset"])
+            f.write(array.data)
+        f.truncate(offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def read_header(path):
+    """
+    Returns the parsed header of a file written by save_arrays.
+    """
+
+    with open(path, "rb") as f:
+        if f.read(8) != MAGIC:
+            raise ValueError(f"{path} is not a StellarSim array file")
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length))
+
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported array file version: {header['version']}")
+    return header
+
+
+def load_arrays(path, mmap_mode="r"):
+    """
+    Loads the arrays and metadata saved with save_arrays. Returns (arrays, metadata).
+
+    With a mmap_mode ("r" read-only, "r+" read-write, "c" copy-on-write) the arrays
+    are memory-mapped: loading is instant whatever the size, and data is only read
+    from disk when accessed. With mmap_mode=None the whole file is read into memory.
+    """
+
+    header = read_header(path)
+    if mmap_mode is None:
+        raw = np.fromfile(path, dtype=np.uint8)
+    else:
+        raw = np.memmap(path, dtype=np.uint8, mode=mmap_mode)
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        size = dtype.itemsize * int(np.prod(shape))
+        start = entry["offset"]
+        arrays[name] = raw[start:start + size].view(dtype).reshape(shape)
+    return arrays, header["metadata"]
@@ -0,0 +1,27 @@
+import warnings
+from simulation.config import *
+
+# Compiled kernels, only when Numba is installed
+try:
+    from simulation import numba_kernels
+except ImportError:
+    numba_kernels = None
+
+BACKENDS = ("numpy", "numba")
+
+
+def resolve_backend(name=BACKEND):
+    """
+    Name of the backend to use for the requested one: "numpy", "numba", or "auto"
+    (Numba when it is installed, NumPy otherwise). Requesting "numba" without Numba
+    installed falls back to NumPy with a warning.
+    """
+
+    if name == "auto":
+        return "numba" if numba_kernels is not None else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+    if name == "numba" and numba_kernels is None:
+        warnings.warn("Numba is not installed, using the NumPy backend")
+        return "numpy"
+    return name
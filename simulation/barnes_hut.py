@@ -0,0 +1,253 @@
+import sys
+import time
+import numpy as np
+from simulation.config import *
+from simulation.physics import calculate_gravity_accelerations, expand_ranges
+
+# Deepest level of the quadtree. The root square is split in 2^MAX_DEPTH cells per side.
+MAX_DEPTH = 16
+
+
+def interleave_bits(values):
+    """
+    Spreads the lower 16 bits of each value so that there is a zero between every
+    two bits (used to build Morton codes: x bits on even positions, y bits on odd ones).
+    """
+
+    values = values.astype(np.uint64) & np.uint64(0xFFFF)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x00FF00FF)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x33333333)
+    values = (values | (values << np.uint64(1))) & np.uint64(0x55555555)
+    return values
+
+
+class QuadTree:
+    """
+    Quadtree over the WIDTH x HEIGHT domain (grown to contain every body), stored
+    level by level as arrays instead of node objects.
+
+    Bodies are sorted by their Morton code, so every cell of every level is a
+    contiguous range of sorted bodies. For each level the tree stores the code,
+    number of bodies, total mass and center of mass of every non-empty cell, and
+    where its children start in the next level.
+    """
+
+    def __init__(self, positions, masses, max_depth=MAX_DEPTH):
+        self.max_depth = max_depth
+
+        # Root square: the simulation window, grown to contain every body
+        low = np.minimum(positions.min(axis=0), (0, 0))
+        high = np.maximum(positions.max(axis=0), (WIDTH, HEIGHT))
+        self.origin = low
+        self.size = float(np.max(high - low)) * (1 + 1e-9)
+
+        # Integer cell coordinates at the deepest level and Morton code of every body
+        cells_per_side = 2 ** max_depth
+        cell = ((positions - low) / self.size * cells_per_side).astype(np.int64)
+        np.clip(cell, 0, cells_per_side - 1, out=cell)
+        keys = interleave_bits(cell[:, 0]) | (interleave_bits(cell[:, 1]) << np.uint64(1))
+
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys # Morton code of every body (original order)
+        sorted_keys = keys[self.order]
+        sorted_masses = masses[self.order]
+        sorted_moments = positions[self.order] * sorted_masses[:, None]
+
+        self.codes = [] # Per level: Morton code prefix of each cell
+        self.starts = [] # Per level: index of the first body of each cell (in sorted order)
+        self.counts = [] # Per level: number of bodies in each cell
+        self.masses = [] # Per level: total mass of each cell
+        self.centers = [] # Per level: center of mass of each cell
+        self.first_child = [] # Per level: index of the first child cell in the next level
+        self.child_count = [] # Per level: number of children
+
+        for level in range(max_depth + 1):
+            codes = sorted_keys >> np.uint64(2 * (max_depth - level))
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            counts = np.diff(np.r_[starts, len(codes)])
+
+            cell_masses = np.add.reduceat(sorted_masses, starts)
+            moments = np.add.reduceat(sorted_moments, starts, axis=0)
+            centers = np.empty_like(moments)
+            has_mass = cell_masses > 0
+            centers[has_mass] = moments[has_mass] / cell_masses[has_mass, None]
+            # Massless cells: use the position of their first body
+            centers[~has_mass] = positions[self.order[starts[~has_mass]]]
+
+            self.codes.append(codes[starts])
+            self.starts.append(starts)
+            self.counts.append(counts)
+            self.masses.append(cell_masses)
+            self.centers.append(centers)
+
+            # Every body is alone in its cell: deeper levels would add nothing
+            if counts.max() == 1:
+                break
+
+        self.depth = len(self.codes) - 1
+        for level in range(self.depth):
+            child_codes = self.codes[level + 1]
+            first = np.searchsorted(child_codes, self.codes[level] << np.uint64(2))
+            last = np.searchsorted(child_codes, (self.codes[level] + np.uint64(1)) << np.uint64(2))
+            self.first_child.append(first)
+            self.child_count.append(last - first)
+
+    def cell_size(self, level):
+        return self.size / 2 ** level
+
+    def accelerations(self, G, positions, masses, theta, out=None, softening=0.0, rows=None):
+        """
+        Returns the (N, 2) gravitational accelerations of the bodies used to build the tree
+        (only of the bodies in 'rows' if given, as a (len(rows), 2) array). Softening
+        is applied to every point mass as in calculate_gravity_accelerations.
+
+        All bodies walk the tree together, one level at a time, as a list of
+        (body, cell) pairs. A cell is used as a single point mass (its center of mass)
+        when it is small compared to its distance to the body (size / distance < theta),
+        or when it holds a single body. Otherwise the pair is replaced by pairs with
+        each of the cell's children, or with each of its bodies at the deepest level.
+        """
+
+        n = len(positions)
+        targets = np.arange(n) if rows is None else np.asarray(rows)
+        if out is None:
+            out = np.empty((len(targets), 2))
+        total = out if rows is None else np.empty((n, 2)) # Indexed by body
+        total[:] = 0
+        softening_sq = softening * softening
+
+        bodies = targets
+        cells = np.zeros(len(targets), dtype=np.int64)
+
+        for level in range(self.depth + 1):
+            if len(bodies) == 0:
+                break
+
+            codes = self.codes[level][cells]
+            counts = self.counts[level][cells]
+            cell_masses = self.masses[level][cells]
+            centers = self.centers[level][cells]
+
+            # Does the cell contain the body itself?
+            shift = np.uint64(2 * (self.max_depth - level))
+            contains = (self.keys[bodies] >> shift) == codes
+
+            dx = centers[:, 0] - positions[bodies, 0]
+            dy = centers[:, 1] - positions[bodies, 1]
+            distance_sq = dx * dx + dy * dy
+
+            # Opening criterion: size / distance < theta (compared squared).
+            # Single-body cells are exact point masses (the body itself is skipped)
+            size = self.cell_size(level)
+            far = (size * size < theta * theta * distance_sq) & ~contains
+            accept = far | ((counts == 1) & ~contains)
+            self._add_point_masses(total, positions, bodies[accept], cell_masses[accept], centers[accept], softening_sq)
+
+            # Open the rejected cells (bodies alone in their own cell are done)
+            rejected = ~accept & ~((counts == 1) & contains)
+            open_bodies = bodies[rejected]
+            open_cells = cells[rejected]
+
+            if level == self.depth:
+                # Deepest level: interact directly with every body of the cell
+                n_members = counts[rejected]
+                members = self.order[expand_ranges(self.starts[level][open_cells], n_members)]
+                open_bodies = np.repeat(open_bodies, n_members)
+                others = members != open_bodies
+                self._add_point_masses(total, positions, open_bodies[others], masses[members[others]],
+                                       positions[members[others]], softening_sq)
+                break
+
+            # One new pair per child
+            n_children = self.child_count[level][open_cells]
+            bodies = np.repeat(open_bodies, n_children)
+            cells = expand_ranges(self.first_child[level][open_cells], n_children)
+
+        if rows is not None:
+            out[:] = total[targets]
+        out *= G
+        return out
+
+    @staticmethod
+    def _add_point_masses(out, positions, bodies, masses, centers, softening_sq=0.0):
+        """
+        Adds to 'out' the acceleration of each body caused by the matching point mass
+        (without G).
+        """
+
+        dx = centers[:, 0] - positions[bodies, 0]
+        dy = centers[:, 1] - positions[bodies, 1]
+        r_sq = dx * dx + dy * dy + softening_sq
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = masses / (r_sq * np.sqrt(r_sq))
+        weights[r_sq == 0] = 0 # Avoid division by 0
+
+        n = len(out)
+        out[:, 0] += np.bincount(bodies, weights=weights * dx, minlength=n)
+        out[:, 1] += np.bincount(bodies, weights=weights * dy, minlength=n)
+
+
+def calculate_barnes_hut_accelerations(G, positions, masses, theta, out=None, softening=0.0, rows=None):
+    """
+    Given a gravitational constant G, an (N, 2) array of positions, an (N,) array of
+    masses and an opening angle theta, returns the (N, 2) array of gravitational
+    accelerations approximated with a Barnes-Hut quadtree built for this step
+    (see QuadTree.accelerations for softening and rows).
+    """
+
+    if len(positions) == 0:
+        return np.empty((0, 2)) if out is None else out
+
+    tree = QuadTree(positions, masses)
+    return tree.accelerations(G, positions, masses, theta, out=out, softening=softening, rows=rows)
+
+
+def compare_with_direct(positions, masses, thetas=(0.2, 0.3, 0.5, 0.7, 1.0), repeats=3):
+    """
+    Accuracy versus speed report of the Barnes-Hut solver against the direct solver.
+    Returns one row per theta with the solve times, the speedup and the relative
+    error of the accelerations (median, 99th percentile and maximum).
+    """
+
+    def best_time(solve):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = solve()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    direct_time, exact = best_time(lambda: calculate_gravity_accelerations(G, positions, masses))
+    exact_norm = np.hypot(exact[:, 0], exact[:, 1])
+    exact_norm[exact_norm == 0] = 1
+
+    report = []
+    for theta in thetas:
+        tree_time, approx = best_time(lambda: calculate_barnes_hut_accelerations(G, positions, masses, theta))
+        error = np.hypot(*(approx - exact).T) / exact_norm
+        report.append({
+            "theta": theta,
+            "direct_time": direct_time,
+            "barnes_hut_time": tree_time,
+            "speedup": direct_time / tree_time,
+            "median_error": float(np.median(error)),
+            "p99_error": float(np.percentile(error, 99)),
+            "max_error": float(error.max()),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    # Usage: python -m simulation.barnes_hut [number_of_bodies]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = np.random.default_rng(0)
+    positions = rng.uniform((0, 0), (WIDTH, HEIGHT), size=(n, 2))
+    masses = rng.uniform(1, 10, size=n)
+
+    print(f"Barnes-Hut vs direct summation, {n} bodies")
+    print(f"{'theta':>6} {'direct ms':>10} {'tree ms':>10} {'speedup':>8} {'median err':>11} {'p99 err':>9} {'max err':>9}")
+    for row in compare_with_direct(positions, masses):
+        print(f"{row['theta']:>6.2f} {row['direct_time'] * 1000:>10.1f} {row['barnes_hut_time'] * 1000:>10.1f} "
+              f"{row['speedup']:>8.2f} {row['median_error']:>11.2e} {row['p99_error']:>9.2e} {row['max_error']:>9.2e}")
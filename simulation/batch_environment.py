@@ -0,0 +1,152 @@
+import numpy as np
+from simulation.config import *
+from simulation.orbit_predictor import OutcomeCache, UNCERTAIN
+from simulation.metrics import RewardMetrics
+
+
+def two_body_step(sun_pos, sun_vel, planet_pos, planet_vel, sun_mass, timestep):
+    """
+    Advances many independent sun-planet pairs one frame, in place (one row per
+    pair). sun_mass is a number or one mass per pair.
+    """
+
+    # Gravity between the sun and the planet of each pair
+    d = planet_pos - sun_pos
+    distance_sq = np.einsum("ij,ij->i", d, d)
+    inv_distance_cube = 1 / (distance_sq * np.sqrt(distance_sq))
+    pull = d * (G * inv_distance_cube)[:, None]
+
+    # Movement (same integration as Body.movement)
+    sun_vel += pull * (PLANET_MASS * timestep)
+    planet_vel -= pull * (np.asarray(sun_mass)[..., None] * timestep)
+    sun_pos += sun_vel * timestep
+    planet_pos += planet_vel * timestep
+
+
+def launch_failed(sun_pos, planet_pos):
+    """
+    Whether the planet of each pair has hit its sun or left the window (the
+    failure conditions of an experimental-mode episode).
+    """
+
+    d = planet_pos - sun_pos
+    colliding = np.einsum("ij,ij->i", d, d) <= (SUN_RADIUS + PLANET_RADIUS) ** 2
+    x = planet_pos[:, 0]
+    y = planet_pos[:, 1]
+    out_of_bounds = (x < 0) | (x > WIDTH) | (y < 0) | (y > HEIGHT)
+    return colliding | out_of_bounds
+
+
+class BatchAgentEnvironment:
+    """
+    Many independent experimental-mode episodes simulated in lockstep.
+
+    Each lane is one episode with its own sun and planet, exactly like
+    AgentSimulation, but the state of all lanes lives in NumPy arrays and every
+    step advances all of them at once. Lanes that end (collision, out of bounds
+    or timeout) are evaluated, reported to the agent and relaunched in place.
+
+    With predict_outcomes, launches whose outcome is certain from their initial
+    orbit end on the next step without being simulated.
+    """
+
+    def __init__(self, agent, lanes=1024, timestep=TIMESTEP, seed=None, predict_outcomes=False):
+        self.agent = agent
+        self.lanes = lanes
+        self.timestep = timestep
+        self.rng = np.random.default_rng(seed)
+
+        self.center = np.array([WIDTH / 2, HEIGHT / 2])
+        self.sun_pos = np.zeros((lanes, 2)) # Sun and planet state of each lane
+        self.sun_vel = np.zeros((lanes, 2))
+        self.planet_pos = np.zeros((lanes, 2))
+        self.planet_vel = np.zeros((lanes, 2))
+        self.actions = None # Agent action of each lane (rows of the agent's action arrays)
+        self.episode_duration = np.zeros(lanes, dtype=int) # Frames simulated in each lane
+        self.predicted = np.zeros(lanes, dtype=np.int8) # Predicted reward of each lane (0 = simulate)
+        self.outcome_cache = OutcomeCache(agent) if predict_outcomes else None
+
+        self.episode = 0 # Number of episodes launched
+        self.metrics = RewardMetrics() # Statistics of all episode outcomes
+
+        self.update_episode_max_duration()
+        self.reset_lanes(np.arange(lanes))
+
+    def update_episode_max_duration(self):
+        """
+        Max duration of an episode in frames, as in AgentSimulation.
+        """
+
+        fps = 60
+        self.episode_max_time = int((EPISODE_SECONDS / self.timestep) * fps)
+
+    def reset_lanes(self, lanes):
+        """
+        Starts a new episode in each of the given lanes: the sun is placed in the
+        center and the agent launches a planet from a random position around it.
+        """
+
+        if len(lanes) == 0:
+            return
+
+        self.sun_pos[lanes] = self.center
+        self.sun_vel[lanes] = 0
+
+        angle = self.rng.uniform(0, 2 * np.pi, len(lanes))
+        dx = LAUNCH_DISTANCE * np.cos(angle)
+        dy = LAUNCH_DISTANCE * np.sin(angle)
+        self.planet_pos[lanes, 0] = self.center[0] + dx
+        self.planet_pos[lanes, 1] = self.center[1] + dy
+
+        # Agent decisions based on its knowledge
+        velocity, launch_angle, actions = self.agent.select_action_batch(dx, dy)
+        self.planet_vel[lanes, 0] = velocity * np.cos(launch_angle)
+        self.planet_vel[lanes, 1] = velocity * np.sin(launch_angle)
+        if self.actions is None:
+            self.actions = np.zeros((self.lanes, actions.shape[1]), dtype=actions.dtype)
+        self.actions[lanes] = actions
+
+        if self.outcome_cache is not None:
+            self.predicted[lanes] = self.outcome_cache.predict(
+                actions, dx, dy, self.planet_vel[lanes, 0], self.planet_vel[lanes, 1],
+                self.episode_max_time * self.timestep, self.timestep)
+
+        self.episode_duration[lanes] = 0
+        self.episode += len(lanes)
+
+    def step(self):
+        """
+        Advances every lane one frame. Finished episodes are evaluated, fed back to
+        the agent and relaunched. Returns the lanes that finished and their rewards.
+        """
+
+        two_body_step(self.sun_pos, self.sun_vel, self.planet_pos, self.planet_vel, SUN_MASS, self.timestep)
+        self.episode_duration += 1
+
+        # Episode end conditions
+        failed = launch_failed(self.sun_pos, self.planet_pos)
+        timeout = self.episode_duration >= self.episode_max_time
+        predicted = self.predicted != UNCERTAIN
+        finished = np.flatnonzero(failed | timeout | predicted)
+        if len(finished) == 0:
+            return finished, np.empty(0, dtype=int)
+
+        rewards = np.where(failed[finished], -1, 1) # +1 for a successful orbit
+        rewards = np.where(predicted[finished], self.predicted[finished], rewards)
+        self.agent.give_feedback_batch(self.actions[finished], rewards)
+        self.metrics.add_batch(rewards)
+
+        self.reset_lanes(finished)
+        return finished, rewards
+
+    def run(self, episodes):
+        """
+        Steps all lanes until at least the given number of episodes have finished.
+        Returns the rewards of the episodes that finished, in order.
+        """
+
+        target = self.metrics.episodes + episodes
+        rewards = []
+        while self.metrics.episodes < target:
+            rewards.append(self.step()[1])
+        return np.concatenate(rewards) if rewards else np.empty(0, dtype=int)
@@ -1,16 +1,59 @@
 import pygame
 import math
+import numpy as np
 from simulation.config import *
 from simulation.physics import *
 
 
+class BodyStorage:
+    """
+    Contiguous arrays holding the values of a group of bodies, one row per body:
+    positions, velocities, accelerations (N, 2), masses and radii (N,) and colors (N, 3).
+    """
+
+    fields = ("_pos", "_vel", "_acc", "_mass", "_radius", "_color")
+
+    def __init__(self, capacity):
+        self._pos = np.zeros((capacity, 2))
+        self._vel = np.zeros((capacity, 2))
+        self._acc = np.zeros((capacity, 2))
+        self._mass = np.zeros(capacity)
+        self._radius = np.zeros(capacity)
+        self._color = np.zeros((capacity, 3), dtype=np.uint8)
+
+    @property
+    def capacity(self):
+        return len(self._mass)
+
+    def copy_row(self, index, source, source_index):
+        """
+        Copies every value of row 'source_index' of another storage into row 'index'.
+        """
+
+        self._pos[index] = source._pos[source_index]
+        self._vel[index] = source._vel[source_index]
+        self._acc[index] = source._acc[source_index]
+        self._mass[index] = source._mass[source_index]
+        self._radius[index] = source._radius[source_index]
+        self._color[index] = source._color[source_index]
+
+
 class Body:
     """
     Represents a celestial body in the simulation with basic physics properties:
     position, velocity, acceleration, mass, radius, and color.
+
+    A body is a lightweight view into one row of a SystemState: its attributes read
+    and write the shared arrays. A body that has not been added to a system keeps
+    its values in a private one-row storage.
     """
 
+    __slots__ = ("_system", "_index") # No per-body __dict__: a body is just a handle
+
     def __init__(self, x, y, radius, color, mass, vx, vy):
+        self._system = BodyStorage(1) # Storage holding this body's values
+        self._index = 0 # Row of this body inside the storage
+
         self.x = x # Position (in pixels)
         self.y = y
         self.radius = radius # Radius (in pixels)
@@ -21,6 +64,100 @@ class Body:
         self.ax = 0 # Acceleration (pixels/frame^2)
         self.ay = 0
 
+    @classmethod
+    def view(cls, system, index):
+        """
+        Creates a body bound to an existing row of a storage, without copying values.
+        """
+
+        body = cls.__new__(cls)
+        body._system = system
+        body._index = index
+        return body
+
+    def detach(self):
+        """
+        Copies this body's values into a private storage, so it stays usable
+        after being removed from its system.
+        """
+
+        storage = BodyStorage(1)
+        storage.copy_row(0, self._system, self._index)
+        self._system = storage
+        self._index = 0
+
+    @property
+    def x(self):
+        return self._system._pos[self._index, 0]
+
+    @x.setter
+    def x(self, value):
+        self._system._pos[self._index, 0] = value
+
+    @property
+    def y(self):
+        return self._system._pos[self._index, 1]
+
+    @y.setter
+    def y(self, value):
+        self._system._pos[self._index, 1] = value
+
+    @property
+    def vx(self):
+        return self._system._vel[self._index, 0]
+
+    @vx.setter
+    def vx(self, value):
+        self._system._vel[self._index, 0] = value
+
+    @property
+    def vy(self):
+        return self._system._vel[self._index, 1]
+
+    @vy.setter
+    def vy(self, value):
+        self._system._vel[self._index, 1] = value
+
+    @property
+    def ax(self):
+        return self._system._acc[self._index, 0]
+
+    @ax.setter
+    def ax(self, value):
+        self._system._acc[self._index, 0] = value
+
+    @property
+    def ay(self):
+        return self._system._acc[self._index, 1]
+
+    @ay.setter
+    def ay(self, value):
+        self._system._acc[self._index, 1] = value
+
+    @property
+    def mass(self):
+        return self._system._mass[self._index]
+
+    @mass.setter
+    def mass(self, value):
+        self._system._mass[self._index] = value
+
+    @property
+    def radius(self):
+        return self._system._radius[self._index]
+
+    @radius.setter
+    def radius(self, value):
+        self._system._radius[self._index] = value
+
+    @property
+    def color(self):
+        return tuple(self._system._color[self._index].tolist())
+
+    @color.setter
+    def color(self, value):
+        self._system._color[self._index] = value
+
     def apply_gravity(self, others):
         """
         Updates this body's acceleration based on gravitational attraction 
@@ -34,10 +171,10 @@ class Body:
             if other is self:
                 continue
             
-            # Distance calculation
+            # Distance calculation (softened: sqrt(r^2 + eps^2), see SOFTENING)
             dx = other.x - self.x
             dy = other.y - self.y
-            distance = math.hypot(dx, dy)
+            distance = math.sqrt(dx * dx + dy * dy + SOFTENING * SOFTENING)
 
             if distance == 0:
                 continue # Avoid division by 0
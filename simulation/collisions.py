@@ -0,0 +1,104 @@
+import numpy as np
+from simulation.physics import expand_ranges
+from simulation.backend import numba_kernels
+
+# Neighbor cells checked from each cell. Only half of the 8 neighbors are needed:
+# the other half see this cell as their neighbor, so every pair is found once.
+NEIGHBOR_OFFSETS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+# Most grid cells along each axis: cells grow when bodies are spread wider, so
+# cell keys (at most about MAX_GRID_CELLS ** 2) stay far from int64 overflow
+MAX_GRID_CELLS = 2 ** 20
+
+
+def find_collisions(positions, radii, cell_size=None, backend="numpy"):
+    """
+    Returns two arrays (first, second) with the indices of every pair of colliding
+    bodies (based on radius overlap), with first < second.
+
+    Broadphase: bodies are sorted into a uniform grid whose cells are as wide as the
+    biggest body, so two overlapping bodies are always in the same or in neighboring
+    cells. Only those candidate pairs reach the exact distance test (narrow phase),
+    which the "numba" backend runs compiled, in parallel and without building the
+    candidate arrays.
+    """
+
+    n = len(positions)
+    if n < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    if cell_size is None:
+        cell_size = 2 * radii.max()
+    low = positions.min(axis=0)
+    extent = float((positions.max(axis=0) - low).max())
+    cell_size = max(cell_size, extent / MAX_GRID_CELLS, 1e-9)
+
+    # Integer cell coordinates from the lowest corner, shifted so that neighbors of any cell are never negative
+    cells = np.floor((positions - low) / cell_size).astype(np.int64) + 1
+    rows = cells[:, 1].max() + 2
+    keys = cells[:, 0] * rows + cells[:, 1]
+
+    # Bodies sorted by cell: every cell is a contiguous range of the sorted order
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    if backend == "numba":
+        return numba_kernels.collision_pairs(sorted_keys, order, np.ascontiguousarray(positions, dtype=np.float64),
+                                             np.ascontiguousarray(radii, dtype=np.float64), rows)
+
+    # Pairs inside the same cell: each body with the ones after it in its cell
+    starts = np.arange(1, n + 1)
+    ends = np.searchsorted(sorted_keys, sorted_keys, side="right")
+    candidates_a = [np.repeat(order, ends - starts)]
+    candidates_b = [order[expand_ranges(starts, ends - starts)]]
+
+    # Pairs with the neighbor cells
+    for offset_x, offset_y in NEIGHBOR_OFFSETS:
+        neighbor_keys = sorted_keys + offset_x * rows + offset_y
+        starts = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+        ends = np.searchsorted(sorted_keys, neighbor_keys, side="right")
+        candidates_a.append(np.repeat(order, ends - starts))
+        candidates_b.append(order[expand_ranges(starts, ends - starts)])
+
+    a = np.concatenate(candidates_a)
+    b = np.concatenate(candidates_b)
+
+    # Narrow phase: distance <= radius_a + radius_b (compared squared)
+    dx = positions[a, 0] - positions[b, 0]
+    dy = positions[a, 1] - positions[b, 1]
+    reach = radii[a] + radii[b]
+    colliding = dx * dx + dy * dy <= reach * reach
+
+    first = np.minimum(a[colliding], b[colliding])
+    second = np.maximum(a[colliding], b[colliding])
+    return first, second
+
+
+def collision_removals(positions, radii, serials=None, backend="numpy"):
+    """
+    Returns a boolean mask of the bodies to keep after handling collisions.
+    On collision, the body of the pair added later is removed (the one with the
+    larger serial number, or the larger index without serials), so the result
+    does not depend on the order in which pairs are found.
+    """
+
+    keep = np.ones(len(positions), dtype=bool)
+    first, second = find_collisions(positions, radii, backend=backend)
+    if serials is not None:
+        second = np.where(serials[first] > serials[second], first, second)
+    keep[second] = False
+    return keep
+
+
+def remove_collisions(system):
+    """
+    Removes from a SystemState the bodies lost in collisions (see collision_removals).
+    Returns how many were removed.
+    """
+
+    keep = collision_removals(system.positions, system.radii, system.serials, system.backend)
+    removed = len(keep) - int(keep.sum())
+    if removed:
+        system.remove_rows(keep)
+    return removed
@@ -20,4 +20,64 @@ DEFAULT_PARAMS = {
 
 # Gravitational constant and simulation time step
 G = 1
-TIMESTEP = 1
\ No newline at end of file
+TIMESTEP = 1
+
+# Physics steps per second of real time at normal speed (+/- change it) and the most run in one frame
+PHYSICS_RATE = 60
+MAX_SUBSTEPS = 16
+
+# Where physics runs: None (in the render loop), "thread" or "process" (background worker, no diagnostics or recording)
+PHYSICS_WORKER = None
+WORKER_CAPACITY = 65536 # Most bodies a background worker simulates
+
+# Gravity solver: "direct" (exact sum over all pairs) or "barnes_hut" (quadtree approximation for large systems)
+GRAVITY_SOLVER = "direct"
+BARNES_HUT_THETA = 0.5 # Barnes-Hut opening angle: lower is more accurate, higher is faster
+
+# Gravitational softening length: r^2 becomes r^2 + SOFTENING^2, so close passes give finite forces (0 = exact)
+SOFTENING = 0.0
+
+# Compute backend: "numpy", "numba" (compiled parallel kernels, needs numba installed) or "auto"
+BACKEND = "auto"
+
+# Integrator: "euler" (semi-implicit Euler), "leapfrog" (Velocity-Verlet), "rk4", "adaptive" (Dormand-Prince 5(4))
+# or "block" (leapfrog with individual timesteps: only bodies in close encounters take small substeps)
+INTEGRATOR = "euler"
+ADAPTIVE_TOLERANCE = 1e-6 # Local error tolerance of the adaptive integrator
+BLOCK_LEVELS = 6 # Time bins of the block integrator: steps of timestep, timestep/2, ... timestep/2^(levels-1)
+BLOCK_ETA = 0.05 # Accuracy of the block integrator: step of a body = BLOCK_ETA * its shortest free-fall time
+
+# Conservation diagnostics (energy, momentum, angular momentum)
+DIAGNOSTICS_INTERVAL = 10 # Steps between two measurements
+DIAGNOSTICS_FILE = None # Optional ".csv" or ".npz" file where measurements are saved
+
+# Frame profiler (per-phase timings of the main loop)
+PROFILER_WINDOW = 300 # Recent frames used for the percentiles
+PROFILER_FILE = None # Optional ".json" or ".csv" file where the timings are saved on exit
+
+# Scene file written and read by the save/load keys (and by "python -m simulation.scenes")
+SCENE_FILE = "scene.stellar"
+
+# Trajectory recording (replay with "python -m simulation.replay FILE")
+TRAJECTORY_FILE = None # Optional file where every step of the simulation is recorded (not with PHYSICS_WORKER)
+TRAJECTORY_CHUNK_FRAMES = 64 # Frames compressed together (and read together when seeking)
+
+# Agent checkpoints (experimental mode): learned state and reward statistics, loaded on start if the file exists
+CHECKPOINT_FILE = None # Optional checkpoint file
+CHECKPOINT_EPISODES = 500 # Episodes between checkpoints
+
+# Episode reward statistics (experimental mode and training)
+METRICS_WINDOW = 1000 # Recent episodes the windowed success rate is computed over
+METRICS_INTERVAL = 100 # Episodes between two points of the exported time series (doubles as it fills)
+METRICS_MAX_POINTS = 1024 # Most points kept in the time series
+
+# Parameter sweeps of experimental-mode launches ("python -m simulation.sweep")
+SWEEP_CHUNK = 4096 # Launches simulated together, and saved together to the result file
+
+# Experimental mode: central sun, launched planet and episode length
+SUN_RADIUS = 20
+SUN_MASS = 2000
+PLANET_RADIUS = 5
+PLANET_MASS = 1
+LAUNCH_DISTANCE = 300 # Distance from the sun where planets are launched
+EPISODE_SECONDS = 20 # Simulated seconds a planet must survive
\ No newline at end of file
@@ -0,0 +1,163 @@
+import csv
+import numpy as np
+from simulation.config import *
+from simulation.physics import GRAVITY_BLOCK_SIZE
+
+# Quantities recorded in every sample, in order
+FIELDS = ("step", "time", "bodies", "kinetic", "potential", "energy",
+          "momentum_x", "momentum_y", "angular_momentum",
+          "energy_drift", "momentum_drift", "angular_momentum_drift")
+
+
+def calculate_kinetic_energy(velocities, masses):
+    """
+    Total kinetic energy: sum of m * v^2 / 2.
+    """
+
+    return 0.5 * float(np.dot(masses, np.einsum("ij,ij->i", velocities, velocities)))
+
+
+def calculate_potential_energy(G, positions, masses, softening=0.0):
+    """
+    Total gravitational potential energy: -G * sum over pairs of m1 * m2 / r, with
+    r = sqrt(r^2 + eps^2) when softened (the potential of the softened force).
+    Pairs at distance 0 are skipped, as in the gravity calculation.
+    """
+
+    n = len(positions)
+    x = positions[:, 0]
+    y = positions[:, 1]
+    total = 0.0
+
+    for start in range(0, n, GRAVITY_BLOCK_SIZE):
+        stop = min(start + GRAVITY_BLOCK_SIZE, n)
+        dx = x - x[start:stop, None]
+        dy = y - y[start:stop, None]
+        distance = np.sqrt(dx * dx + dy * dy + softening * softening)
+        with np.errstate(divide="ignore"):
+            inverse = 1 / distance
+        inverse[(dx == 0) & (dy == 0)] = 0 # Self-interaction
+        total += float(masses[start:stop] @ inverse @ masses)
+
+    # Every pair was counted twice
+    return -G * total / 2
+
+
+def calculate_momentum(velocities, masses):
+    """
+    Total linear momentum (px, py): sum of m * v.
+    """
+
+    px, py = masses @ velocities
+    return float(px), float(py)
+
+
+def calculate_angular_momentum(positions, velocities, masses):
+    """
+    Total angular momentum around the origin: sum of m * (x * vy - y * vx).
+    """
+
+    cross = positions[:, 0] * velocities[:, 1] - positions[:, 1] * velocities[:, 0]
+    return float(np.dot(masses, cross))
+
+
+class Diagnostics:
+    """
+    Tracks how well the simulation conserves energy, linear momentum and angular
+    momentum. Every 'interval' steps it measures the system and computes the drift
+    of each quantity since the first sample (a new first sample is taken whenever
+    bodies are added or removed, since that changes the totals).
+
+    Samples can be streamed to a CSV file (one row per sample) or saved to an NPZ
+    file (one array per quantity) when closed. Measuring is skipped while disabled.
+    """
+
+    def __init__(self, interval=DIAGNOSTICS_INTERVAL, path=None, enabled=True):
+        self.enabled = enabled
+        self.interval = interval
+        self.steps = 0
+        self.time = 0.0 # Simulated time
+        self.latest = None # Last sample
+        self.baseline = None # Sample the drift is measured from
+        self.baseline_bodies = None # Number of bodies when the baseline was taken
+
+        self.path = path
+        self.samples = [] # Kept only for NPZ output
+        self._file = None
+        self._writer = None
+        if path is not None and path.endswith(".csv"):
+            self._file = open(path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(FIELDS)
+
+    def update(self, system, timestep):
+        """
+        Called after every step. Measures the system every 'interval' steps.
+        """
+
+        self.steps += 1
+        self.time += timestep
+        if self.enabled and self.steps % self.interval == 0:
+            self.measure(system)
+
+    def reset_baseline(self):
+        """
+        Measures drift from the next sample on (e.g. after the system is rebuilt).
+        """
+
+        self.baseline = None
+
+    def measure(self, system):
+        """
+        Takes a sample of the system and records it.
+        """
+
+        positions = system.positions
+        velocities = system.velocities
+        masses = system.masses
+
+        kinetic = calculate_kinetic_energy(velocities, masses)
+        potential = calculate_potential_energy(G, positions, masses, system.softening)
+        px, py = calculate_momentum(velocities, masses)
+        angular = calculate_angular_momentum(positions, velocities, masses)
+        sample = {
+            "step": self.steps, "time": self.time, "bodies": len(masses),
+            "kinetic": kinetic, "potential": potential, "energy": kinetic + potential,
+            "momentum_x": px, "momentum_y": py, "angular_momentum": angular,
+        }
+
+        if self.baseline is None or self.baseline_bodies != len(masses):
+            self.baseline = sample
+            self.baseline_bodies = len(masses)
+
+            # Scales for the momentum drifts (total momentum is often close to 0)
+            speeds = np.hypot(velocities[:, 0], velocities[:, 1])
+            self._momentum_scale = float(np.dot(masses, speeds)) or 1.0
+            arms = np.hypot(positions[:, 0], positions[:, 1])
+            self._angular_scale = float(np.dot(masses, arms * speeds)) or 1.0
+
+        base = self.baseline
+        sample["energy_drift"] = abs(sample["energy"] - base["energy"]) / (abs(base["energy"]) or 1.0)
+        sample["momentum_drift"] = float(np.hypot(px - base["momentum_x"], py - base["momentum_y"])) / self._momentum_scale
+        sample["angular_momentum_drift"] = abs(angular - base["angular_momentum"]) / self._angular_scale
+
+        self.latest = sample
+        if self._writer is not None:
+            self._writer.writerow([sample[field] for field in FIELDS])
+            self._file.flush()
+        elif self.path is not None:
+            self.samples.append([sample[field] for field in FIELDS])
+        return sample
+
+    def close(self):
+        """
+        Closes the CSV stream, or writes the NPZ file.
+        """
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        elif self.path is not None and self.samples:
+            data = np.array(self.samples, dtype=float)
+            np.savez(self.path, **{field: data[:, i] for i, field in enumerate(FIELDS)})
@@ -0,0 +1,265 @@
+import numpy as np
+from simulation.backend import numba_kernels
+from simulation.config import *
+
+
+class EulerIntegrator:
+    """
+    Semi-implicit Euler: velocity is updated with the current acceleration, then
+    position with the new velocity. One gravity evaluation per step, first order.
+    """
+
+    def step(self, system, timestep):
+        if system.backend == "numba" and system.gravity_solver == "direct":
+            # Gravity and movement fused in one compiled call
+            numba_kernels.euler_step(G, system.positions, system.velocities, system.accelerations,
+                                     system.masses, timestep, system.softening)
+            system.forces_stale = True
+            return
+
+        system.apply_gravity()
+        system.movement(timestep)
+
+
+class LeapfrogIntegrator:
+    """
+    Leapfrog in its Velocity-Verlet form (kick-drift-kick): half a velocity update,
+    a full position update, new accelerations, and the other half velocity update.
+    One gravity evaluation per step (accelerations are reused from the previous
+    step), second order and with no long-term energy drift.
+    """
+
+    def step(self, system, timestep):
+        if system.forces_stale:
+            system.apply_gravity()
+
+        positions = system.positions
+        velocities = system.velocities
+        accelerations = system.accelerations
+
+        velocities += accelerations * (timestep / 2)
+        positions += velocities * timestep
+        system.apply_gravity()
+        velocities += accelerations * (timestep / 2)
+
+
+class RK4Integrator:
+    """
+    Classic fourth order Runge-Kutta. Four gravity evaluations per step, very
+    accurate for smooth motion but not symplectic (energy slowly drifts).
+    """
+
+    def step(self, system, timestep):
+        positions = system.positions
+        velocities = system.velocities
+        x0 = positions.copy()
+        v0 = velocities.copy()
+        accelerate = system.calculate_accelerations
+
+        a1 = accelerate(x0)
+        v2 = v0 + a1 * (timestep / 2)
+        a2 = accelerate(x0 + v0 * (timestep / 2))
+        v3 = v0 + a2 * (timestep / 2)
+        a3 = accelerate(x0 + v2 * (timestep / 2))
+        v4 = v0 + a3 * timestep
+        a4 = accelerate(x0 + v3 * timestep)
+
+        positions[:] = x0 + (v0 + 2 * v2 + 2 * v3 + v4) * (timestep / 6)
+        velocities[:] = v0 + (a1 + 2 * a2 + 2 * a3 + a4) * (timestep / 6)
+        system.accelerations[:] = a1
+        system.forces_stale = True
+
+
+class AdaptiveIntegrator:
+    """
+    Dormand-Prince 5(4) embedded Runge-Kutta with step size control. Every
+    timestep is split into as many substeps as needed so that the estimated local
+    error (difference between the 5th and 4th order solutions) stays below the
+    tolerance. Large steps are taken while bodies are far apart, small ones only
+    during close encounters. The last accepted substep is reused as a first guess.
+    """
+
+    # Butcher tableau
+    A = (
+        (),
+        (1 / 5,),
+        (3 / 40, 9 / 40),
+        (44 / 45, -56 / 15, 32 / 9),
+        (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+        (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+        (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+    )
+    B5 = (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0)
+    B4 = (5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
+
+    def __init__(self, tolerance=ADAPTIVE_TOLERANCE, max_substeps=1000):
+        self.tolerance = tolerance
+        self.max_substeps = max_substeps # Substeps tried per timestep before the rest is forced (avoids stalling)
+        self.substep = None # Last accepted substep size
+
+    def step(self, system, timestep):
+        positions = system.positions
+        velocities = system.velocities
+        elapsed = 0
+        attempts = 0 # Substeps tried, accepted or not
+        min_h = timestep / self.max_substeps
+        h = min(self.substep or timestep, timestep)
+
+        # Always advances exactly one timestep: once max_substeps substeps have been
+        # tried, the rest is covered with accepted substeps of at least min_h
+        while elapsed < timestep:
+            remaining = timestep - elapsed
+            last = h >= remaining
+            h = min(h, remaining)
+            x, v, error = self._try_substep(system, positions, velocities, h)
+            attempts += 1
+
+            if error <= 1 or h <= min_h or attempts > self.max_substeps:
+                positions[:] = x
+                velocities[:] = v
+                elapsed = timestep if last else elapsed + h
+                self.substep = h
+
+            # Standard step size update (bounded to avoid wild changes)
+            factor = 0.9 * error ** -0.2 if error > 0 else 5
+            h *= min(5, max(0.2, factor))
+            if attempts >= self.max_substeps:
+                h = max(h, min_h)
+
+        system.forces_stale = True
+
+    def _try_substep(self, system, x0, v0, h):
+        """
+        One Dormand-Prince substep of size h. Returns the new positions, velocities,
+        and the error estimate relative to the tolerance (<= 1 means accepted).
+        """
+
+        k_x = [] # Stage derivatives of positions (velocities)
+        k_v = [] # Stage derivatives of velocities (accelerations)
+        for row in self.A:
+            x = x0.copy()
+            v = v0.copy()
+            for coefficient, dx, dv in zip(row, k_x, k_v):
+                if coefficient:
+                    x += dx * (h * coefficient)
+                    v += dv * (h * coefficient)
+            k_x.append(v)
+            k_v.append(system.calculate_accelerations(x))
+
+        x5 = x0 + h * sum(b * k for b, k in zip(self.B5, k_x) if b)
+        v5 = v0 + h * sum(b * k for b, k in zip(self.B5, k_v) if b)
+        x_error = h * sum((b5 - b4) * k for b5, b4, k in zip(self.B5, self.B4, k_x))
+        v_error = h * sum((b5 - b4) * k for b5, b4, k in zip(self.B5, self.B4, k_v))
+
+        # Error relative to the tolerance (absolute and relative)
+        x_scale = self.tolerance * (1 + np.maximum(np.abs(x0), np.abs(x5)))
+        v_scale = self.tolerance * (1 + np.maximum(np.abs(v0), np.abs(v5)))
+        error = max(np.max(np.abs(x_error) / x_scale, initial=0), np.max(np.abs(v_error) / v_scale, initial=0))
+        return x5, v5, error
+
+
+class BlockTimestepIntegrator:
+    """
+    Leapfrog (kick-drift-kick) with individual, hierarchical block timesteps.
+
+    Every body is placed in a time bin k and advances with steps of
+    timestep / 2^k, where its closest encounter allows: step = eta times the
+    shortest free-fall time to another body (SystemState.encounter_times).
+    Bodies far from everything stay in bin 0 and need one gravity evaluation per
+    timestep; only bodies in close encounters (and both bodies of each of them)
+    take small substeps. Encounter times are summed directly over all bodies, like
+    the direct gravity solver, also when gravity uses Barnes-Hut. All bodies
+    drift together, and a body's acceleration is only recomputed (against every
+    body) when its own step ends, so the cost follows the number of bodies in
+    close encounters instead of multiplying the whole system's.
+
+    A body can move to a smaller bin whenever its step ends, and to a larger one
+    when its step ends on a boundary of the larger bin. Every body is back in sync
+    at the end of each timestep.
+    """
+
+    def __init__(self, levels=BLOCK_LEVELS, eta=BLOCK_ETA):
+        self.levels = levels
+        self.eta = eta
+        self.bins = None # Time bin of every body during the last timestep
+        self.force_evaluations = 0 # Accelerations of single bodies computed so far
+
+    def step(self, system, timestep):
+        positions = system.positions
+        velocities = system.velocities
+        accelerations = system.accelerations
+        if len(system) == 0:
+            return
+        if system.forces_stale:
+            system.apply_gravity()
+            self.force_evaluations += len(system)
+
+        # Time in ticks of the smallest step; a body in bin k steps 2^(deepest - k) ticks at a time
+        deepest = self.levels - 1
+        ticks = 2 ** deepest
+        tick_time = timestep / ticks
+
+        bins = self.time_bins(system, timestep)
+        length = 2 ** (deepest - bins)
+        velocities += accelerations * (length * tick_time / 2)[:, None] # Opening half kick
+        ends = length.copy() # Tick at which the step of each body ends
+
+        tick = 0
+        while tick < ticks:
+            # Drift everyone to the next end of a step (velocities are constant until then)
+            following = int(ends.min())
+            positions += velocities * ((following - tick) * tick_time)
+            tick = following
+
+            # Closing half kick of the bodies whose step ends, with their new acceleration
+            active = np.flatnonzero(ends == tick)
+            accelerations[active] = system.calculate_accelerations(positions, rows=active)
+            self.force_evaluations += len(active)
+            velocities[active] += accelerations[active] * (length[active] * tick_time / 2)[:, None]
+            if tick == ticks:
+                break
+
+            # Next step of those bodies: any smaller bin, or a larger one if this tick is on its boundary
+            wanted = self.time_bins(system, timestep, active)
+            new_bins = bins[active]
+            smaller = wanted > new_bins
+            new_bins[smaller] = wanted[smaller]
+            larger = (wanted < new_bins) & (tick % (2 * length[active]) == 0)
+            new_bins[larger] -= 1
+            bins[active] = new_bins
+            length[active] = 2 ** (deepest - new_bins)
+
+            velocities[active] += accelerations[active] * (length[active] * tick_time / 2)[:, None]
+            ends[active] = tick + length[active]
+
+        self.bins = bins
+        system.forces_stale = False
+
+    def time_bins(self, system, timestep, rows=None):
+        """
+        Time bin that the current encounters of each body (of 'rows') ask for.
+        """
+
+        steps = self.eta * system.encounter_times(rows)
+        with np.errstate(divide="ignore"):
+            bins = np.ceil(np.log2(timestep / steps))
+        return np.clip(bins, 0, self.levels - 1).astype(np.int64)
+
+
+INTEGRATORS = {
+    "euler": EulerIntegrator,
+    "leapfrog": LeapfrogIntegrator,
+    "rk4": RK4Integrator,
+    "adaptive": AdaptiveIntegrator,
+    "block": BlockTimestepIntegrator,
+}
+
+
+def make_integrator(name):
+    """
+    Creates the integrator with the given name (see INTEGRATORS).
+    """
+
+    if name not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator: {name}")
+    return INTEGRATORS[name]()
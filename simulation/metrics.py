@@ -0,0 +1,205 @@
+import csv
+import json
+import numpy as np
+from simulation.config import *
+
+
+class RewardMetrics:
+    """
+    Running statistics of episode rewards (+1 success, -1 failure) in bounded
+    memory, whatever the number of episodes:
+
+    - counters of episodes, successes and the sum of the rewards,
+    - a ring buffer with the last 'window' rewards (and its number of successes,
+      kept up to date as rewards come in and go out),
+    - a time series with one point every 'interval' episodes: the episode count,
+      the total successes so far and the success rate of the window. When it
+      reaches 'max_points' points, every other point is dropped and the interval
+      doubles, so the series always spans the whole history.
+
+    Every update is O(1) per reward (O(n) for a batch of n), so the UI and the
+    headless trainers can read the rates every frame.
+    """
+
+    def __init__(self, window=METRICS_WINDOW, interval=METRICS_INTERVAL, max_points=METRICS_MAX_POINTS):
+        self.episodes = 0
+        self.successes = 0
+        self.reward_sum = 0
+        self.last = None # Reward of the last episode
+
+        self.rewards = np.zeros(window, dtype=np.int8) # Ring buffer (position episodes % window is the next write)
+        self.window_successes = 0 # Successes among the rewards in the ring buffer
+
+        self.interval = interval # Episodes between two points of the series
+        self.max_points = max_points
+        self.series = np.zeros((max_points, 3)) # (episodes, total successes, window success rate) of every point
+        self.points = 0
+
+    @property
+    def window(self):
+        return len(self.rewards)
+
+    def __len__(self):
+        return self.episodes
+
+    def add(self, reward):
+        """
+        Records the reward of one episode.
+        """
+
+        success = int(reward == 1)
+        position = self.episodes % self.window
+        if self.episodes >= self.window:
+            self.window_successes -= int(self.rewards[position] == 1)
+        self.rewards[position] = reward
+        self.window_successes += success
+
+        self.episodes += 1
+        self.successes += success
+        self.reward_sum += reward
+        self.last = reward
+        if self.episodes % self.interval == 0:
+            self._add_point()
+
+    def add_batch(self, rewards):
+        """
+        Records the rewards of several episodes, in order.
+        """
+
+        rewards = np.asarray(rewards, dtype=np.int8).reshape(-1)
+        while len(rewards):
+            # Up to the next point of the series, so every point sees the window of its episode
+            count = min(len(rewards), self.interval - self.episodes % self.interval)
+            self._add_rewards(rewards[:count])
+            rewards = rewards[count:]
+            if self.episodes % self.interval == 0:
+                self._add_point()
+
+    def _add_rewards(self, rewards):
+        successes = int(np.count_nonzero(rewards == 1))
+        self.successes += successes
+        self.reward_sum += int(rewards.sum(dtype=np.int64))
+        self.last = int(rewards[-1])
+
+        # Only the last 'window' rewards go to the ring buffer, replacing the oldest ones
+        kept = rewards[-self.window:]
+        numbers = self.episodes + len(rewards) - len(kept) + np.arange(len(kept)) # Episode number of each
+        positions = numbers % self.window
+        replaced = self.rewards[positions[numbers >= self.window]]
+        self.window_successes += int(np.count_nonzero(kept == 1)) - int(np.count_nonzero(replaced == 1))
+        self.rewards[positions] = kept
+        self.episodes += len(rewards)
+
+    def _add_point(self):
+        if self.points == self.max_points:
+            # Keep the points at multiples of the doubled interval
+            kept = self.series[1::2].copy()
+            self.points = len(kept)
+            self.series[:self.points] = kept
+            self.interval *= 2
+        self.series[self.points] = (self.episodes, self.successes, self.window_success_rate())
+        self.points += 1
+
+    def recent(self, n=None):
+        """
+        The last n rewards (at most 'window', all of the window by default), oldest first.
+        """
+
+        n = min(self.window if n is None else n, self.window, self.episodes)
+        positions = (self.episodes - n + np.arange(n)) % self.window
+        return self.rewards[positions]
+
+    def success_rate(self):
+        """
+        Fraction of all episodes that were successful.
+        """
+        return self.successes / self.episodes if self.episodes else 0.0
+
+    def window_success_rate(self, n=None):
+        """
+        Fraction of successes among the last n episodes (the whole window by default).
+        """
+
+        if n is None or n >= self.window:
+            stored = min(self.episodes, self.window)
+            return self.window_successes / stored if stored else 0.0
+        recent = self.recent(n)
+        return float(np.count_nonzero(recent == 1)) / len(recent) if len(recent) else 0.0
+
+    def time_series(self):
+        """
+        The points of the series as a dict of lists: episodes, success_rate (of all
+        episodes so far), interval_success_rate (of the episodes since the previous
+        point) and window_success_rate (of the last 'window' episodes).
+        """
+
+        episodes, successes, window_rates = self.series[:self.points].T
+        previous_episodes = np.concatenate(([0], episodes[:-1]))
+        previous_successes = np.concatenate(([0], successes[:-1]))
+        return {
+            "episodes": episodes.astype(int).tolist(),
+            "success_rate": (successes / np.maximum(episodes, 1)).tolist(),
+            "interval_success_rate": ((successes - previous_successes)
+                                      / np.maximum(episodes - previous_episodes, 1)).tolist(),
+            "window_success_rate": window_rates.tolist(),
+        }
+
+    def summary(self):
+        """
+        Counters and rates of all episodes and of the recent window.
+        """
+
+        return {
+            "episodes": self.episodes,
+            "successes": self.successes,
+            "success_rate": self.success_rate(),
+            "mean_reward": self.reward_sum / self.episodes if self.episodes else 0.0,
+            "window": self.window,
+            "window_success_rate": self.window_success_rate(),
+        }
+
+    def export(self, path):
+        """
+        Saves the time series to a file: CSV (one row per point) or JSON (with the
+        summary and the recent rewards too).
+        """
+
+        series = self.time_series()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(series.keys())
+                writer.writerows(zip(*series.values()))
+        else:
+            report = {**self.summary(), "recent_rewards": self.recent().tolist(), "series": series}
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    def state(self):
+        """
+        Arrays and JSON-serializable values that from_state rebuilds the metrics from.
+        """
+
+        arrays = {"recent_rewards": self.recent(), "series": self.series[:self.points]}
+        values = {"episodes": self.episodes, "successes": self.successes, "reward_sum": self.reward_sum,
+                  "window": self.window, "interval": self.interval, "max_points": self.max_points}
+        return arrays, values
+
+    @classmethod
+    def from_state(cls, arrays, values):
+        """
+        Rebuilds metrics saved with state().
+        """
+
+        metrics = cls(window=values["window"], interval=values["interval"], max_points=values["max_points"])
+        recent = np.asarray(arrays["recent_rewards"], dtype=np.int8)
+        metrics.rewards[(values["episodes"] - len(recent) + np.arange(len(recent))) % metrics.window] = recent
+        metrics.window_successes = int(np.count_nonzero(recent == 1))
+        metrics.episodes = values["episodes"]
+        metrics.successes = values["successes"]
+        metrics.reward_sum = values["reward_sum"]
+        metrics.last = int(recent[-1]) if len(recent) else None
+
+        metrics.points = len(arrays["series"])
+        metrics.series[:metrics.points] = arrays["series"]
+        return metrics
@@ -0,0 +1,167 @@
+import numpy as np
+from numba import njit, prange
+
+# Compiled versions of the hot NumPy kernels, for the "numba" backend (see
+# simulation/backend.py). Each loop over bodies runs in parallel across cores.
+# The arithmetic of every pair is the same as in the NumPy kernels; only the
+# order of the sums differs, so results agree to rounding error (and collision
+# tests, which involve no sums, agree exactly).
+
+
+@njit(cache=True)
+def _gravity_of(i, positions, masses, softening_sq):
+    """
+    Acceleration (without G) of body i caused by all the others.
+    """
+
+    ax = 0.0
+    ay = 0.0
+    xi = positions[i, 0]
+    yi = positions[i, 1]
+    for j in range(positions.shape[0]):
+        dx = positions[j, 0] - xi
+        dy = positions[j, 1] - yi
+        distance_sq = dx * dx + dy * dy + softening_sq
+        if distance_sq == 0:
+            continue # Avoid division by 0 (self-interaction without softening)
+        weight = masses[j] / (np.sqrt(distance_sq) * distance_sq)
+        ax += weight * dx
+        ay += weight * dy
+    return ax, ay
+
+
+@njit(parallel=True, cache=True)
+def gravity_accelerations(G, positions, masses, out, softening=0.0):
+    """
+    Same as physics.calculate_gravity_accelerations (direct summation).
+    """
+
+    softening_sq = softening * softening
+    for i in prange(positions.shape[0]):
+        ax, ay = _gravity_of(i, positions, masses, softening_sq)
+        out[i, 0] = G * ax
+        out[i, 1] = G * ay
+    return out
+
+
+@njit(parallel=True, cache=True)
+def gravity_accelerations_of(G, rows, positions, masses, out, softening=0.0):
+    """
+    Same as physics.calculate_gravity_accelerations with rows: accelerations of
+    the bodies in 'rows' only (out has one row per body of 'rows').
+    """
+
+    softening_sq = softening * softening
+    for k in prange(rows.shape[0]):
+        ax, ay = _gravity_of(rows[k], positions, masses, softening_sq)
+        out[k, 0] = G * ax
+        out[k, 1] = G * ay
+    return out
+
+
+@njit(parallel=True, cache=True)
+def encounter_times_of(G, rows, positions, masses, out, softening=0.0):
+    """
+    Same as physics.calculate_encounter_times for the bodies in 'rows'.
+    """
+
+    softening_sq = softening * softening
+    for k in prange(rows.shape[0]):
+        i = rows[k]
+        shortest = np.inf
+        for j in range(positions.shape[0]):
+            if j == i:
+                continue
+            dx = positions[j, 0] - positions[i, 0]
+            dy = positions[j, 1] - positions[i, 1]
+            distance_sq = dx * dx + dy * dy + softening_sq
+            shortest = min(shortest, np.sqrt(distance_sq) * distance_sq / (masses[i] + masses[j]))
+        out[k] = np.sqrt(shortest / G)
+    return out
+
+
+@njit(parallel=True, cache=True)
+def euler_step(G, positions, velocities, accelerations, masses, timestep, softening=0.0):
+    """
+    One semi-implicit Euler step (gravity, then velocities, then positions) in a
+    single compiled call, with no temporary arrays.
+    """
+
+    gravity_accelerations(G, positions, masses, accelerations, softening)
+    n = positions.shape[0]
+    for i in prange(n):
+        velocities[i, 0] += accelerations[i, 0] * timestep
+        velocities[i, 1] += accelerations[i, 1] * timestep
+        positions[i, 0] += velocities[i, 0] * timestep
+        positions[i, 1] += velocities[i, 1] * timestep
+
+
+@njit(cache=True)
+def _collisions_of(s, sorted_keys, order, positions, radii, rows, first, second, count_only):
+    """
+    Collisions of the body at position s of the cell order with the bodies after it
+    in its cell and with the bodies of half of its neighbor cells (the same
+    candidates as collisions.find_collisions). Writes them to first/second unless
+    count_only, and returns how many there are.
+    """
+
+    n = sorted_keys.shape[0]
+    a = order[s]
+    key = sorted_keys[s]
+    found = 0
+
+    # Same cell (bodies after this one), then the neighbor cells (1, 0), (-1, 1), (0, 1), (1, 1)
+    for neighbor in range(5):
+        if neighbor == 0:
+            start = s + 1
+            target = key
+        else:
+            if neighbor == 1:
+                target = key + rows
+            elif neighbor == 2:
+                target = key - rows + 1
+            elif neighbor == 3:
+                target = key + 1
+            else:
+                target = key + rows + 1
+            start = np.searchsorted(sorted_keys, target)
+
+        t = start
+        while t < n and sorted_keys[t] == target:
+            b = order[t]
+            dx = positions[a, 0] - positions[b, 0]
+            dy = positions[a, 1] - positions[b, 1]
+            reach = radii[a] + radii[b]
+            if dx * dx + dy * dy <= reach * reach:
+                if not count_only:
+                    first[found] = min(a, b)
+                    second[found] = max(a, b)
+                found += 1
+            t += 1
+    return found
+
+
+@njit(parallel=True, cache=True)
+def collision_pairs(sorted_keys, order, positions, radii, rows):
+    """
+    Narrow phase of collisions.find_collisions over the bodies sorted by grid cell.
+    Returns the (first, second) index arrays of every colliding pair.
+    """
+
+    n = sorted_keys.shape[0]
+    dummy = np.empty(0, dtype=np.int64)
+
+    # Count the pairs of every body, then write each body's pairs at its offset
+    counts = np.zeros(n, dtype=np.int64)
+    for s in prange(n):
+        counts[s] = _collisions_of(s, sorted_keys, order, positions, radii, rows, dummy, dummy, True)
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    first = np.empty(offsets[n], dtype=np.int64)
+    second = np.empty(offsets[n], dtype=np.int64)
+    for s in prange(n):
+        if counts[s]:
+            _collisions_of(s, sorted_keys, order, positions, radii, rows,
+                           first[offsets[s]:offsets[s + 1]], second[offsets[s]:offsets[s + 1]], False)
+    return first, second
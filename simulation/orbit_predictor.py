@@ -0,0 +1,175 @@
+import numpy as np
+from simulation.config import *
+
+# Codes of the predicted outcomes (rewards, and 0 when the outcome is not certain)
+SUCCESS = 1
+FAILURE = -1
+UNCERTAIN = 0
+
+
+class OrbitPredictor:
+    """
+    Predicts the outcome of an experimental-mode launch from its initial state,
+    using the two-body conic (ellipse or hyperbola) around the sun.
+
+    The specific orbital energy and angular momentum give the periapsis and
+    apoapsis distances, and Kepler's equation gives the time needed to reach any
+    distance. From them a launch is certain to:
+    - fail, if it hits the sun or leaves the window well before the time limit,
+    - succeed, if it never comes close to the sun and cannot reach the window
+      edges before the time limit.
+    Every test keeps safety margins (for the discrete integration and the small
+    motion of the sun), and everything else is reported as uncertain so the
+    episode is simulated.
+
+    All methods work on NumPy arrays (one launch per element).
+    """
+
+    def __init__(self, central_mass=SUN_MASS, planet_mass=PLANET_MASS,
+                 collision_distance=SUN_RADIUS + PLANET_RADIUS, margin=10, time_slack=0.1):
+        self.mu = G * (central_mass + planet_mass) # Gravitational parameter of the pair
+        self.collision_distance = collision_distance
+        self.time_slack = time_slack # Relative safety margin on event times
+
+        # Inside inner_radius the planet is always in the window, beyond outer_radius never
+        self.inner_radius = min(WIDTH, HEIGHT) / 2 - margin
+        self.outer_radius = np.hypot(WIDTH / 2, HEIGHT / 2) + margin
+
+    def predict(self, dx, dy, vx, vy, time_limit, timestep):
+        """
+        Returns the certain outcome (SUCCESS, FAILURE or UNCERTAIN) of each launch from
+        position (dx, dy) relative to the sun with velocity (vx, vy), given the
+        remaining simulated time of the episode and the integration timestep.
+        """
+
+        dx, dy, vx, vy = (np.asarray(value, dtype=float) for value in (dx, dy, vx, vy))
+        mu = self.mu
+        rc = self.collision_distance
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            r0 = np.hypot(dx, dy)
+            energy = (vx * vx + vy * vy) / 2 - mu / r0 # Specific orbital energy
+            h = np.abs(dx * vy - dy * vx) # Specific angular momentum
+            e = np.sqrt(np.maximum(0, 1 + 2 * energy * h * h / (mu * mu))) # Eccentricity
+
+            bound = energy < 0
+            a = np.abs(mu / (2 * energy)) # Semi-major axis (absolute value)
+            periapsis = h * h / mu / (1 + e)
+            apoapsis = np.where(bound, a * (1 + e), np.inf)
+            n = np.sqrt(mu / a ** 3) # Mean motion
+            period = np.where(bound, 2 * np.pi / n, np.inf)
+            outward = dx * vx + dy * vy >= 0
+
+            def time_from_periapsis(r):
+                # Kepler's equation: time from periapsis until the distance r is reached
+                cos_e = np.clip((1 - r / a) / e, -1, 1)
+                big_e = np.arccos(cos_e)
+                elliptic = big_e - e * np.sin(big_e)
+                big_f = np.arccosh(np.maximum((1 + r / a) / e, 1))
+                hyperbolic = e * np.sinh(big_f) - big_f
+                return np.where(bound, elliptic, hyperbolic) / n
+
+            t0 = time_from_periapsis(r0)
+
+            def time_to_reach_outward(r):
+                # Time until the planet first gets farther than r (> r0)
+                t = np.where(outward, time_from_periapsis(r) - t0, t0 + time_from_periapsis(r))
+                return np.where(r > apoapsis, np.inf, t)
+
+            def time_to_reach_inward(r):
+                # Time until the planet first gets closer than r (< r0)
+                t = np.where(outward, period - t0 - time_from_periapsis(r), t0 - time_from_periapsis(r))
+                return np.where(r < periapsis, np.inf, t)
+
+            # Close to the sun, one integration step moves at most periapsis_speed * timestep
+            step = h / periapsis * timestep
+            safe_miss = periapsis > np.maximum(2 * rc, rc + step)
+            chord = 2 * np.sqrt(np.maximum(rc * rc - periapsis * periapsis, 0))
+            sure_hit = (periapsis < rc / 2) & (step < chord)
+
+            early = (1 - self.time_slack) * time_limit
+            late = (1 + self.time_slack) * time_limit
+
+            hits_sun = (sure_hit & (time_to_reach_inward(rc) < early)
+                        & (np.where(outward, apoapsis, r0) < self.inner_radius))
+            leaves = (outward | safe_miss) & (time_to_reach_outward(self.outer_radius) < early)
+            survives = safe_miss & (time_to_reach_outward(self.inner_radius) > late)
+
+            # Parabolic and radial launches are numerically fragile: always simulate them
+            valid = np.isfinite(e) & (np.abs(e - 1) > 1e-3) & (r0 > rc)
+
+        outcome = np.where(hits_sun | leaves, FAILURE, np.where(survives, SUCCESS, UNCERTAIN))
+        return np.where(valid, outcome, UNCERTAIN).astype(np.int8)
+
+
+class OutcomeCache:
+    """
+    Memoized predictions for every discrete agent action (px_bin, py_bin, v_bin, a_bin).
+
+    An action fixes the launch velocity but not the exact launch position, which can
+    be anywhere on the launch circle inside its position bin. The verdict of an action
+    is computed once from launches sampled along that arc: if all of them have the
+    same certain outcome, it is stored and reused; otherwise the action is marked
+    uncertain and each launch is predicted individually.
+    """
+
+    UNKNOWN = 2 # Verdict not computed yet
+
+    def __init__(self, agent, predictor=None, launch_distance=LAUNCH_DISTANCE, samples_per_turn=3600):
+        self.agent = agent
+        self.predictor = predictor if predictor is not None else OrbitPredictor()
+        self.table = np.full(agent.q_table.shape, self.UNKNOWN, dtype=np.int8)
+        self.conditions = None # (time_limit, timestep) the stored verdicts are valid for
+
+        # Launch positions around the sun, grouped by position bin
+        angles = np.linspace(0, 2 * np.pi, samples_per_turn, endpoint=False)
+        self.sample_dx = launch_distance * np.cos(angles)
+        self.sample_dy = launch_distance * np.sin(angles)
+        px_bin, py_bin = agent.discretize_position_batch(self.sample_dx, self.sample_dy)
+        self.sample_bins = px_bin * agent.pos_bins + py_bin
+
+    def predict(self, actions, dx, dy, vx, vy, time_limit, timestep):
+        """
+        Returns the outcome of each launch (rows of 'actions' with their positions and
+        velocities): the memoized verdict of its action when it is certain, or the
+        individual prediction of the launch otherwise.
+        """
+
+        if self.conditions != (time_limit, timestep):
+            self.table[:] = self.UNKNOWN
+            self.conditions = (time_limit, timestep)
+
+        index = tuple(np.asarray(actions).T)
+        verdicts = self.table[index]
+        unknown = verdicts == self.UNKNOWN
+        if unknown.any():
+            for action in np.unique(np.asarray(actions)[unknown], axis=0):
+                self.table[tuple(action)] = self._action_verdict(action, time_limit, timestep)
+            verdicts = self.table[index]
+
+        # Only the launches of uncertain actions are predicted individually
+        outcomes = verdicts.astype(np.int8)
+        uncertain = np.flatnonzero(verdicts == UNCERTAIN)
+        if len(uncertain):
+            dx, dy, vx, vy = (np.broadcast_to(np.asarray(value, dtype=float), verdicts.shape)[uncertain]
+                              for value in (dx, dy, vx, vy))
+            outcomes[uncertain] = self.predictor.predict(dx, dy, vx, vy, time_limit, timestep)
+        return outcomes
+
+    def _action_verdict(self, action, time_limit, timestep):
+        """
+        Outcome shared by all the sampled launches of an action, or UNCERTAIN.
+        """
+
+        px_bin, py_bin, v_bin, a_bin = action
+        in_bin = self.sample_bins == px_bin * self.agent.pos_bins + py_bin
+        if not in_bin.any():
+            return UNCERTAIN
+
+        velocity, angle = self.agent._bin_to_action(v_bin, a_bin)
+        outcomes = self.predictor.predict(self.sample_dx[in_bin], self.sample_dy[in_bin],
+                                          velocity * np.cos(angle), velocity * np.sin(angle),
+                                          time_limit, timestep)
+        if np.all(outcomes == outcomes[0]):
+            return outcomes[0]
+        return UNCERTAIN
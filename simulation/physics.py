@@ -1,4 +1,9 @@
 import math
+import numpy as np
+
+# Number of bodies whose accelerations are computed together in one batch.
+# Bounds the size of the temporary pairwise arrays to GRAVITY_BLOCK_SIZE x N.
+GRAVITY_BLOCK_SIZE = 128
 
 def calculate_circular_orbit_velocity(G, main_mass, dx, dy):
     """
@@ -15,4 +20,93 @@ def calculate_circular_orbit_velocity(G, main_mass, dx, dy):
     vx = velocity * dy / norm
     vy = -velocity * dx / norm
 
-    return vx, vy
\ No newline at end of file
+    return vx, vy
+
+def calculate_gravity_accelerations(G, positions, masses, out=None, softening=0.0, rows=None):
+    """
+    Given a gravitational constant G, an (N, 2) array of positions and an (N,) array
+    of masses, returns the (N, 2) array of gravitational accelerations of every body
+    caused by all the others (direct summation over all pairs).
+
+    With a softening length eps, r^2 is replaced by r^2 + eps^2 (Plummer
+    softening): forces stay finite at close range, so close passes no longer
+    produce huge accelerations. With 'rows' (indices of bodies), only the
+    accelerations of those bodies are computed, as a (len(rows), 2) array.
+    """
+
+    n = len(positions)
+    targets = np.arange(n) if rows is None else np.asarray(rows)
+    if out is None:
+        out = np.empty((len(targets), 2))
+
+    x = positions[:, 0]
+    y = positions[:, 1]
+    softening_sq = softening * softening
+
+    for start in range(0, len(targets), GRAVITY_BLOCK_SIZE):
+        stop = min(start + GRAVITY_BLOCK_SIZE, len(targets))
+        block = targets[start:stop] if rows is not None else slice(start, stop)
+
+        # Distance from each body of the block to every body: rows = block, columns = all
+        dx = x - x[block, None]
+        dy = y - y[block, None]
+        distance_sq = dx * dx
+        distance_sq += dy * dy
+        if softening_sq:
+            distance_sq += softening_sq
+
+        # a = G * m / r^2 in the direction (dx/r, dy/r) --> G * m * d / r^3
+        weights = np.sqrt(distance_sq)
+        weights *= distance_sq
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(masses, weights, out=weights)
+        weights[distance_sq == 0] = 0 # Avoid division by 0 (self-interaction without softening)
+
+        out[start:stop, 0] = G * np.einsum("ij,ij->i", weights, dx)
+        out[start:stop, 1] = G * np.einsum("ij,ij->i", weights, dy)
+
+    return out
+
+def calculate_encounter_times(G, positions, masses, softening=0.0, rows=None):
+    """
+    Given a gravitational constant G, an (N, 2) array of positions and an (N,) array
+    of masses, returns for every body (of 'rows' if given) the shortest free-fall
+    time sqrt(r^3 / (G * (m1 + m2))) to any other body: the time scale on which its
+    closest encounter changes its motion. Both bodies of a pair get the same time.
+    """
+
+    n = len(positions)
+    targets = np.arange(n) if rows is None else np.asarray(rows)
+    out = np.empty(len(targets))
+
+    x = positions[:, 0]
+    y = positions[:, 1]
+    softening_sq = softening * softening
+
+    for start in range(0, len(targets), GRAVITY_BLOCK_SIZE):
+        stop = min(start + GRAVITY_BLOCK_SIZE, len(targets))
+        block = targets[start:stop]
+
+        dx = x - x[block, None]
+        dy = y - y[block, None]
+        distance_sq = dx * dx
+        distance_sq += dy * dy
+        distance_sq += softening_sq
+
+        # r^3 / (m1 + m2), without the body itself
+        times = np.sqrt(distance_sq)
+        times *= distance_sq
+        times /= masses + masses[block, None]
+        times[np.arange(stop - start), block] = np.inf
+        out[start:stop] = times.min(axis=1, initial=np.inf)
+
+    return np.sqrt(out / G)
+
+def expand_ranges(starts, lengths):
+    """
+    Returns the concatenation of the integer ranges [start, start + length)
+    for every pair of the 'starts' and 'lengths' arrays.
+    """
+
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
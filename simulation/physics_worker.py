@@ -0,0 +1,277 @@
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from simulation.body import Body
+from simulation.system import SystemState
+from simulation.collisions import remove_collisions
+from simulation.scheduler import FixedStepScheduler
+from simulation.config import *
+
+
+class SnapshotBuffer:
+    """
+    Double-buffered copy of what the render loop needs from the system: positions,
+    radii and colors of up to 'capacity' bodies, in two slots.
+
+    The physics side writes a new snapshot into the back slot while the render
+    side reads the front one, then swaps them. Only the swap and the reads take the
+    lock, so drawing never waits for a step. The arrays live in a plain buffer
+    (thread mode) or in shared memory (process mode).
+    """
+
+    def __init__(self, capacity, lock, memory=None):
+        self.capacity = capacity
+        self.lock = lock
+        self.memory = memory
+        buffer = memory.buf if memory is not None else bytearray(self.size(capacity))
+
+        # Header: front slot, number of bodies in slot 0, number of bodies in slot 1
+        self.header = np.ndarray(3, np.int64, buffer, 0)
+        offset = self.header.nbytes
+        self.positions = np.ndarray((2, capacity, 2), np.float64, buffer, offset)
+        offset += self.positions.nbytes
+        self.radii = np.ndarray((2, capacity), np.float64, buffer, offset)
+        offset += self.radii.nbytes
+        self.colors = np.ndarray((2, capacity, 3), np.uint8, buffer, offset)
+
+    @staticmethod
+    def size(capacity):
+        """
+        Bytes needed for the given capacity.
+        """
+
+        return 3 * 8 + 2 * capacity * (2 * 8 + 8 + 3)
+
+    def publish(self, system):
+        """
+        Writes the current bodies of the system into the back slot and makes it the front one.
+        """
+
+        back = 1 - int(self.header[0])
+        n = min(len(system), self.capacity)
+        self.positions[back, :n] = system.positions[:n]
+        self.radii[back, :n] = system.radii[:n]
+        self.colors[back, :n] = system.colors[:n]
+
+        with self.lock:
+            self.header[1 + back] = n
+            self.header[0] = back
+
+    def read(self):
+        """
+        Copies of the positions, radii and colors in the front slot.
+        """
+
+        with self.lock:
+            front = int(self.header[0])
+            n = int(self.header[1 + front])
+            return self.positions[front, :n].copy(), self.radii[front, :n].copy(), self.colors[front, :n].copy()
+
+    def release(self):
+        """
+        Drops the views into the buffer (shared memory cannot be closed while they exist).
+        """
+
+        self.header = self.positions = self.radii = self.colors = None
+        if self.memory is not None:
+            self.memory.close()
+
+
+class PhysicsEngine:
+    """
+    Physics side of a PhysicsWorker: owns the system, applies the commands sent by
+    the render loop and advances the simulation at its own pace.
+    """
+
+    def __init__(self, bodies, timestep, steps_per_second, capacity):
+        self.timestep = timestep
+        self.capacity = capacity
+        self.paused = False
+        self.scheduler = FixedStepScheduler(steps_per_second)
+        self.reset(bodies)
+
+    def reset(self, bodies):
+        self.system = SystemState([Body(*values) for values in bodies])
+        self.sun = self.system[0] if len(self.system) else None # Planets orbit the first body
+
+    def apply(self, command):
+        name, *args = command
+        if name == "add":
+            values, orbit = args
+            if len(self.system) >= self.capacity:
+                print(f"Physics worker: capacity of {self.capacity} bodies reached")
+                return
+            body = Body(*values)
+            self.system.append(body)
+            if orbit and self.sun is not None:
+                body.set_circular_orbit(self.sun)
+        elif name == "reset":
+            self.reset(args[0])
+        elif name == "pause":
+            self.paused = args[0]
+        elif name == "speed":
+            self.scheduler.steps_per_second = args[0]
+
+    def step(self):
+        self.system.step(self.timestep)
+        removed = remove_collisions(self.system)
+        if removed:
+            print(f"Collision: {removed} bodies removed")
+
+    def run(self, snapshots, commands, stop):
+        """
+        Worker loop: commands, as many steps as the scheduler allows, and a new
+        snapshot whenever something changed, until 'stop' is set.
+        """
+
+        snapshots.publish(self.system)
+        last = time.perf_counter()
+
+        while not stop.is_set():
+            changed = False
+            while True:
+                try:
+                    command = commands.get_nowait()
+                except queue.Empty:
+                    break
+                self.apply(command)
+                changed = True
+
+            now = time.perf_counter()
+            elapsed = now - last
+            last = now
+
+            steps = 0
+            if not self.paused:
+                steps = self.scheduler.advance(elapsed, self.step)
+            if steps or changed:
+                snapshots.publish(self.system)
+
+            # Wait for the next step (briefly, to keep picking up commands)
+            if not steps:
+                time.sleep(0.001)
+
+
+def _process_main(memory_name, capacity, lock, commands, stop, bodies, timestep, steps_per_second):
+    """
+    Entry point of the worker process.
+    """
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    snapshots = SnapshotBuffer(capacity, lock, memory)
+    try:
+        PhysicsEngine(bodies, timestep, steps_per_second, capacity).run(snapshots, commands, stop)
+    finally:
+        snapshots.release()
+
+
+def body_values(body):
+    """
+    Constructor arguments of a copy of the body (sent to the worker instead of the
+    body itself, which may be a view into a whole system).
+    """
+
+    return (body.x, body.y, body.radius, body.color, body.mass, body.vx, body.vy)
+
+
+class PhysicsWorker:
+    """
+    Runs the physics of a system away from the pygame event and render loop, so
+    input and drawing stay responsive however long a step takes.
+
+    - mode "thread": a background thread. The gravity, integration and collision
+      kernels spend most of their time inside NumPy, which releases the GIL, so
+      the render loop keeps running meanwhile.
+    - mode "process": a separate process, for when the Python side of a step is
+      significant too. Snapshots are shared through shared memory.
+
+    The render loop reads the latest snapshot of the bodies (snapshot()), and
+    changes to the system (new bodies, reset, pause, speed) are sent as commands.
+    """
+
+    def __init__(self, bodies, mode="thread", timestep=TIMESTEP, steps_per_second=PHYSICS_RATE, capacity=WORKER_CAPACITY):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown physics worker mode: {mode}")
+
+        self.mode = mode
+        self.timestep = timestep
+        self.steps_per_second = steps_per_second
+        self.capacity = capacity # Most bodies the worker simulates
+        self.initial_bodies = [body_values(body) for body in bodies]
+
+        self.memory = None
+        self.snapshots = None
+        self.commands = None
+        self.stop = None
+        self.runner = None # Thread or process
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self.mode == "thread":
+            self.snapshots = SnapshotBuffer(self.capacity, threading.Lock())
+            self.commands = queue.Queue()
+            self.stop = threading.Event()
+            engine = PhysicsEngine(self.initial_bodies, self.timestep, self.steps_per_second, self.capacity)
+            self.runner = threading.Thread(target=engine.run, args=(self.snapshots, self.commands, self.stop), daemon=True)
+        else:
+            self.memory = shared_memory.SharedMemory(create=True, size=SnapshotBuffer.size(self.capacity))
+            lock = multiprocessing.Lock()
+            self.snapshots = SnapshotBuffer(self.capacity, lock, self.memory)
+            self.commands = multiprocessing.Queue()
+            self.stop = multiprocessing.Event()
+            self.runner = multiprocessing.Process(
+                target=_process_main,
+                args=(self.memory.name, self.capacity, lock, self.commands, self.stop,
+                      self.initial_bodies, self.timestep, self.steps_per_second),
+                daemon=True,
+            )
+
+        self.runner.start()
+
+    def close(self):
+        """
+        Stops the worker and frees the snapshot buffers.
+        """
+
+        if self.runner is None:
+            return
+        self.stop.set()
+        self.runner.join()
+        self.runner = None
+
+        self.snapshots.release()
+        if self.memory is not None:
+            self.memory.unlink()
+            self.memory = None
+
+    def snapshot(self):
+        """
+        Positions, radii and colors of the bodies in the latest published step.
+        """
+
+        return self.snapshots.read()
+
+    def add(self, body, orbit=False):
+        """
+        Adds a copy of the body (in a circular orbit around the first body if 'orbit').
+        """
+
+        self.commands.put(("add", body_values(body), orbit))
+
+    def reset(self, bodies):
+        self.commands.put(("reset", [body_values(body) for body in bodies]))
+
+    def set_paused(self, paused):
+        self.commands.put(("pause", paused))
+
+    def set_speed(self, steps_per_second):
+        self.commands.put(("speed", steps_per_second))
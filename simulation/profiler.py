@@ -0,0 +1,179 @@
+import csv
+import json
+import time
+from contextlib import nullcontext
+import numpy as np
+from simulation.config import *
+
+# Context returned by disabled profilers: timing a phase then costs almost nothing
+_NOT_TIMED = nullcontext()
+
+
+class RollingSamples:
+    """
+    Fixed-size ring buffer keeping the most recent values of a measurement.
+    """
+
+    def __init__(self, size):
+        self.values = np.zeros(size)
+        self.count = 0 # Total values added (also the next write position)
+
+    def add(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def recent(self):
+        """
+        The stored values (the last 'size' added, not in order).
+        """
+
+        return self.values[:min(self.count, len(self.values))]
+
+
+class _PhaseTimer:
+    """
+    Context manager that measures one phase and records it in the profiler.
+    """
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class _FrameTimer:
+    """
+    Context manager that measures a whole frame and adds up the phases run during it.
+    """
+
+    __slots__ = ("profiler", "start")
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.start = 0.0
+
+    def __enter__(self):
+        self.profiler._frame_totals = {}
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        totals, profiler._frame_totals = profiler._frame_totals, None
+
+        # One sample per phase and frame: 0 for the known phases that did not run
+        for name in profiler.samples:
+            if name != "frame" and name not in totals:
+                totals[name] = 0.0
+        for name, seconds in totals.items():
+            profiler._add(name, seconds)
+        profiler._add("frame", elapsed)
+
+
+class FrameProfiler:
+    """
+    Per-phase timers for the main loop (events, physics, collisions, drawing...).
+    Each phase keeps its last 'window' durations to report rolling percentiles.
+
+    Usage:
+        with profiler.frame():
+            with profiler.phase("physics"):
+                ...
+
+    Inside frame(), a phase run several times (e.g. once per physics step) is added
+    up into a single sample, so every phase has one sample per frame and the
+    phases add up to "frame". Outside of frame(), every run is its own sample.
+
+    While disabled, phase() and frame() return a shared empty context and nothing
+    is recorded.
+    """
+
+    def __init__(self, enabled=False, window=PROFILER_WINDOW):
+        self.enabled = enabled
+        self.window = window # Number of recent frames the percentiles are computed over
+        self.samples = {} # Phase name -> RollingSamples (seconds)
+        self._timers = {} # Phase name -> reusable timer
+        self._frame_timer = _FrameTimer(self)
+        self._frame_totals = None # Phase name -> seconds so far in the current frame (inside frame())
+
+    def phase(self, name):
+        """
+        Context manager timing the phase with the given name.
+        """
+
+        if not self.enabled:
+            return _NOT_TIMED
+
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def frame(self):
+        """
+        Context manager timing a whole frame (the "frame" phase).
+        """
+
+        if not self.enabled:
+            return _NOT_TIMED
+        return self._frame_timer
+
+    def record(self, name, seconds):
+        if self._frame_totals is not None:
+            self._frame_totals[name] = self._frame_totals.get(name, 0.0) + seconds
+        else:
+            self._add(name, seconds)
+
+    def _add(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = RollingSamples(self.window)
+        samples.add(seconds)
+
+    def summary(self):
+        """
+        Returns, for every phase, its p50, p95 and p99 durations, mean and max (in
+        milliseconds) over the recent frames, and the number of frames measured.
+        """
+
+        report = {}
+        for name, samples in self.samples.items():
+            values = samples.recent() * 1000
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            report[name] = {
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "mean_ms": float(values.mean()),
+                "max_ms": float(values.max()),
+                "frames": samples.count,
+            }
+        return report
+
+    def export(self, path):
+        """
+        Saves the summary to a file: CSV (one row per phase) or JSON (also with the
+        recent raw durations of every phase, in milliseconds).
+        """
+
+        report = self.summary()
+        if path.endswith(".csv"):
+            fields = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms", "frames")
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(("phase",) + fields)
+                for name, row in report.items():
+                    writer.writerow([name] + [row[field] for field in fields])
+        else:
+            for name, row in report.items():
+                row["recent_ms"] = (self.samples[name].recent() * 1000).tolist()
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,105 @@
+import argparse
+import sys
+import pygame
+from simulation.trajectory import TrajectoryReader
+from ui.interface import draw_controls, text_cache
+from ui.renderer import BodyRenderer
+from simulation.config import *
+
+REPLAY_CONTROLS_TEXT = (
+    "Controls:",
+    "",
+    "Space = Pause/Resume",
+    "+/- = Change speed",
+    "Left/Right = Step",
+    "Up/Down = Jump 10 s",
+    "Home/End = Start/End",
+)
+
+
+class ReplayPlayer:
+    """
+    Plays back a recorded trajectory file: no physics runs, frames are read from
+    the file (only the chunks needed), so any frame can be reached instantly and
+    long recordings play at any speed.
+    """
+
+    def __init__(self, path):
+        self.reader = TrajectoryReader(path)
+
+        pygame.init()
+        self.window = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption(f"StellarSim - Replay of {path}")
+
+        self.clock = pygame.time.Clock()
+        self.renderer = BodyRenderer()
+        self.running = True
+        self.paused = False
+        self.position = 0.0 # Current frame (fractional when playing slowly)
+        self.speed = 1.0 # Frames played per displayed frame
+
+    def run(self):
+        while self.running:
+            self.clock.tick(60)
+            self.handle_events()
+            if not self.paused:
+                self.seek(self.position + self.speed)
+            self.render()
+
+        pygame.quit()
+        sys.exit()
+
+    def seek(self, frame):
+        """
+        Moves to the given frame (clamped to the recording).
+        """
+
+        self.position = min(max(frame, 0), max(len(self.reader) - 1, 0))
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    self.paused = not self.paused
+                elif event.key == pygame.K_PLUS:
+                    self.speed = round(self.speed + 0.2, 2)
+                elif event.key == pygame.K_MINUS and self.speed > 0.2:
+                    self.speed = round(self.speed - 0.2, 2)
+                elif event.key == pygame.K_RIGHT:
+                    self.seek(int(self.position) + 1)
+                elif event.key == pygame.K_LEFT:
+                    self.seek(int(self.position) - 1)
+                elif event.key == pygame.K_UP:
+                    self.seek(self.position + 600)
+                elif event.key == pygame.K_DOWN:
+                    self.seek(self.position - 600)
+                elif event.key == pygame.K_HOME:
+                    self.seek(0)
+                elif event.key == pygame.K_END:
+                    self.seek(len(self.reader) - 1)
+
+    def render(self):
+        self.window.fill(BLACK)
+        if len(self.reader):
+            frame = int(self.position)
+            positions, radii, colors, label = self.reader.frame(frame)
+            self.renderer.draw(self.window, positions, radii, colors)
+
+            self.window.blit(text_cache.render(f"Frame: {frame + 1} / {len(self.reader)}"), (10, 10))
+            self.window.blit(text_cache.render(f"Speed: x{self.speed}"), (10, 35))
+            if label:
+                self.window.blit(text_cache.render(f"Episode: {label}"), (10, 60))
+
+        draw_controls(self.window, REPLAY_CONTROLS_TEXT)
+        pygame.display.flip()
+
+
+if __name__ == "__main__":
+    # Usage: python -m simulation.replay run.traj
+    parser = argparse.ArgumentParser(description="Play back a recorded trajectory.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    ReplayPlayer(args.path).run()
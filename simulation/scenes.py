@@ -0,0 +1,160 @@
+import argparse
+import numpy as np
+from simulation.array_file import save_arrays, load_arrays
+from simulation.system import SystemState
+from simulation.config import *
+
+# Arrays stored for every body of a scene, in this order
+SCENE_ARRAYS = ("positions", "velocities", "masses", "radii", "colors")
+
+PALETTE = np.array([BLUE, RED, GREEN, WHITE], dtype=np.uint8)
+
+
+def save_scene(path, system, **metadata):
+    """
+    Saves every body of a SystemState (positions, velocities, masses, radii and
+    colors) to a binary array file, in the order the bodies were added.
+    """
+
+    arrays = {name: getattr(system, name) for name in SCENE_ARRAYS}
+    serials = system.serials
+    if np.any(serials[1:] < serials[:-1]):
+        order = np.argsort(serials, kind="stable")
+        arrays = {name: array[order] for name, array in arrays.items()}
+
+    save_arrays(path, arrays, {"bodies": len(system), **metadata})
+
+
+def load_scene(path, mmap=True, **options):
+    """
+    Loads a scene saved with save_scene as a new SystemState (options are passed
+    to SystemState). With mmap, the arrays are memory-mapped copy-on-write: even
+    huge scenes load instantly, pages are read when first used, and changes are
+    never written back to the file.
+    """
+
+    arrays, _ = load_arrays(path, mmap_mode="c" if mmap else None)
+    return SystemState.from_arrays(*(arrays[name] for name in SCENE_ARRAYS), **options)
+
+
+def _circular_speeds(distances, enclosed_masses):
+    return np.sqrt(G * enclosed_masses / np.maximum(distances, 1e-9))
+
+
+def generate_disk(n, rng, center=(WIDTH / 2, HEIGHT / 2), inner=40, outer=330,
+                  star_mass=2000, disk_mass=200, body_radius=1):
+    """
+    A star with n - 1 light bodies orbiting it in a disk. Bodies are spread
+    uniformly over the area of the ring between 'inner' and 'outer', each in a
+    circular orbit around the mass enclosed by its own orbit.
+    """
+
+    m = n - 1
+    distances = np.sqrt(rng.uniform(inner ** 2, outer ** 2, m))
+    angles = rng.uniform(0, 2 * np.pi, m)
+    masses = np.full(m, disk_mass / max(m, 1))
+
+    # Mass inside each orbit: the star plus the disk bodies closer to it
+    order = np.argsort(distances)
+    enclosed = np.empty(m)
+    enclosed[order] = star_mass + np.cumsum(masses[order]) - masses[order]
+    speeds = _circular_speeds(distances, enclosed)
+
+    positions = np.column_stack((center[0] + distances * np.cos(angles), center[1] + distances * np.sin(angles)))
+    velocities = np.column_stack((-speeds * np.sin(angles), speeds * np.cos(angles)))
+
+    star = {"positions": [center], "velocities": [(0, 0)], "masses": [star_mass],
+            "radii": [20], "colors": [YELLOW]}
+    disk = {"positions": positions, "velocities": velocities, "masses": masses,
+            "radii": np.full(m, body_radius), "colors": PALETTE[rng.integers(len(PALETTE), size=m)]}
+    return _concatenate(star, disk)
+
+
+def generate_cluster(n, rng, center=(WIDTH / 2, HEIGHT / 2), scale=120, total_mass=4000, body_radius=1):
+    """
+    A self-gravitating cluster: n bodies of equal mass with a Plummer-like
+    (dense core, long tail) distribution around the center, and random velocities
+    of the size that roughly keeps it in equilibrium (virial). The total
+    momentum is zero.
+    """
+
+    u = rng.uniform(0.01, 0.99, n)
+    distances = scale / np.sqrt(u ** (-2 / 3) - 1)
+    angles = rng.uniform(0, 2 * np.pi, n)
+    positions = np.column_stack((center[0] + distances * np.cos(angles), center[1] + distances * np.sin(angles)))
+
+    dispersion = np.sqrt(G * total_mass / (6 * scale))
+    velocities = rng.normal(0, dispersion, (n, 2))
+    velocities -= velocities.mean(axis=0)
+
+    return {"positions": positions, "velocities": velocities, "masses": np.full(n, total_mass / n),
+            "radii": np.full(n, body_radius), "colors": PALETTE[rng.integers(len(PALETTE), size=n)]}
+
+
+def generate_binaries(n, rng, separation=(6, 30), star_mass=(50, 200), body_radius=2):
+    """
+    n // 2 binary stars scattered over the window: each pair orbits its common
+    center of mass in a circular orbit, with no motion of the pair as a whole.
+    """
+
+    pairs = n // 2
+    centers = rng.uniform((0, 0), (WIDTH, HEIGHT), (pairs, 2))
+    distances = rng.uniform(*separation, pairs)
+    angles = rng.uniform(0, 2 * np.pi, pairs)
+    m1 = rng.uniform(*star_mass, pairs)
+    m2 = rng.uniform(*star_mass, pairs)
+
+    # Circular orbit of two bodies: relative speed sqrt(G (m1 + m2) / d), split by mass
+    direction = np.column_stack((np.cos(angles), np.sin(angles)))
+    normal = np.column_stack((-direction[:, 1], direction[:, 0]))
+    speed = np.sqrt(G * (m1 + m2) / distances)
+    share1 = (m2 / (m1 + m2))[:, None] # Fraction of the separation/speed of the first star
+    share2 = (m1 / (m1 + m2))[:, None]
+
+    positions = np.concatenate((centers - direction * distances[:, None] * share1,
+                                centers + direction * distances[:, None] * share2))
+    velocities = np.concatenate((-normal * speed[:, None] * share1, normal * speed[:, None] * share2))
+    colors = PALETTE[rng.integers(len(PALETTE), size=pairs)]
+
+    return {"positions": positions, "velocities": velocities, "masses": np.concatenate((m1, m2)),
+            "radii": np.full(2 * pairs, body_radius), "colors": np.concatenate((colors, colors))}
+
+
+GENERATORS = {
+    "disk": generate_disk,
+    "cluster": generate_cluster,
+    "binaries": generate_binaries,
+}
+
+
+def generate_scene(kind, n, seed=0, **options):
+    """
+    Generates a scene of about n bodies ("disk", "cluster" or "binaries") as a new
+    SystemState. The same kind, n and seed always give the same initial state.
+    """
+
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown scene: {kind}")
+
+    arrays = GENERATORS[kind](n, np.random.default_rng(seed), **options)
+    return SystemState.from_arrays(*(arrays[name] for name in SCENE_ARRAYS))
+
+
+def _concatenate(*parts):
+    return {name: np.concatenate([np.asarray(part[name], dtype=float if name != "colors" else np.uint8)
+                                  for part in parts])
+            for name in SCENE_ARRAYS}
+
+
+if __name__ == "__main__":
+    # Usage: python -m simulation.scenes disk 100000 --seed 1 --output disk.scene
+    parser = argparse.ArgumentParser(description="Generate a scene and save it to a file.")
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("bodies", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=SCENE_FILE)
+    args = parser.parse_args()
+
+    system = generate_scene(args.kind, args.bodies, seed=args.seed)
+    save_scene(args.output, system, kind=args.kind, seed=args.seed)
+    print(f"Saved {len(system)} bodies to {args.output}")
@@ -0,0 +1,70 @@
+import time
+from simulation.config import *
+
+
+class FixedStepScheduler:
+    """
+    Runs physics steps of a fixed size at a steady rate, independently of the
+    frame rate. Every frame, the elapsed wall-clock time is added to an
+    accumulator and converted into whole steps (steps_per_second of them per
+    second of real time); the remainder is carried over to the next frame.
+
+    Changing the speed changes how many steps run per second, never the step
+    size, so accuracy does not depend on the speed.
+
+    When the physics cannot keep up, each frame runs at most 'max_substeps' steps
+    (and stops early once the frame budget is used up) and the backlog is dropped:
+    the simulation slows down instead of falling further and further behind.
+    """
+
+    def __init__(self, steps_per_second=PHYSICS_RATE, max_substeps=MAX_SUBSTEPS, budget=1 / 60):
+        self.steps_per_second = steps_per_second
+        self.max_substeps = max_substeps
+        self.budget = budget # Wall-clock seconds per frame the steps may take
+        self.accumulator = 0.0 # Pending steps (fractional)
+        self.dropped = 0 # Steps skipped because the physics was too slow
+
+    @property
+    def alpha(self):
+        """
+        Fraction of a step elapsed since the last one (to interpolate rendering).
+        """
+
+        return min(self.accumulator, 1.0)
+
+    def advance(self, elapsed, step):
+        """
+        Adds 'elapsed' wall-clock seconds and calls step() once per whole step due.
+        Returns the number of steps run.
+        """
+
+        self.accumulator += elapsed * self.steps_per_second
+        start = time.perf_counter()
+
+        steps = 0
+        while self.accumulator >= 1 and steps < self.max_substeps:
+            step()
+            self.accumulator -= 1
+            steps += 1
+            if time.perf_counter() - start > self.budget:
+                break
+
+        # Too slow to catch up: drop the backlog rather than spiral
+        if self.accumulator >= 1:
+            self.dropped += int(self.accumulator)
+            self.accumulator %= 1
+
+        return steps
+
+
+def interpolate_positions(previous, current, alpha):
+    """
+    Positions a fraction alpha of the way from the previous step to the current one.
+    Callers set previous to None whenever bodies are added or removed (rows may
+    move), and then the current positions are returned; the shape check is only
+    a safeguard.
+    """
+
+    if previous is None or previous.shape != current.shape:
+        return current
+    return previous + (current - previous) * alpha
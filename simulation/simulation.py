@@ -1,8 +1,17 @@
 import pygame
 import sys
 from simulation.body import Body
+from simulation.system import SystemState
+from simulation.collisions import remove_collisions
 from simulation.physics import *
-from ui.interface import draw_interface
+from simulation.diagnostics import Diagnostics
+from simulation.profiler import FrameProfiler
+from simulation.scheduler import FixedStepScheduler, interpolate_positions
+from simulation.physics_worker import PhysicsWorker
+from simulation.scenes import save_scene, load_scene
+from simulation.trajectory import TrajectoryRecorder
+from ui.interface import draw_interface, draw_diagnostics, draw_profiler
+from ui.renderer import BodyRenderer
 from simulation.config import *
 from simulation.agent_environment import AgentSimulation
 
@@ -29,7 +38,7 @@ class Simulation:
         self.current_params = DEFAULT_PARAMS.copy()
 
         self.sun = Body(WIDTH/2, HEIGHT/2, 20, YELLOW, 2000, 0, 0)
-        self.bodies = [self.sun]
+        self.bodies = SystemState([self.sun])
 
         self.color_palette = [
             BLUE, 
@@ -39,7 +48,36 @@ class Simulation:
         ]
         self.color_index = 0
 
-        self.timestep = TIMESTEP
+        self.timestep = TIMESTEP # Fixed: the speed keys change how many steps run per second
+
+        # Physics steps run at their own rate; rendering interpolates between the last two
+        self.scheduler = FixedStepScheduler()
+        self.previous_positions = None
+
+        # Energy and momentum conservation measurements (always on when saved to a file)
+        self.show_diagnostics = False
+        self.diagnostics = Diagnostics(path=DIAGNOSTICS_FILE, enabled=DIAGNOSTICS_FILE is not None)
+
+        # Per-phase frame timings (always on when saved to a file)
+        self.show_profiler = False
+        self.profiler = FrameProfiler(enabled=PROFILER_FILE is not None)
+
+        self.renderer = BodyRenderer()
+
+        # Optional recording of every step (replayed with simulation/replay.py). Steps run in
+        # the physics worker are not seen by this loop, so they cannot be recorded
+        self.recorder = None
+        if TRAJECTORY_FILE is not None:
+            if PHYSICS_WORKER is not None:
+                print("Trajectories cannot be recorded while physics runs in a background worker")
+            else:
+                self.recorder = TrajectoryRecorder(TRAJECTORY_FILE, self.timestep)
+
+        # Optional background physics: the worker owns the system, this loop only draws its snapshots
+        self.worker = None
+        if PHYSICS_WORKER is not None:
+            self.worker = PhysicsWorker(self.bodies, mode=PHYSICS_WORKER)
+            self.worker.start()
     
     def run(self):
         """
@@ -47,10 +85,18 @@ class Simulation:
         """
 
         while self.running:
-            self.clock.tick(60)
-            self.handle_events()
-            self.update()
-            self.render()
+            elapsed = self.clock.tick(60) / 1000
+            with self.profiler.frame():
+                with self.profiler.phase("events"):
+                    self.handle_events()
+                if not self.paused and self.worker is None:
+                    self.scheduler.advance(elapsed, self.update)
+                self.render()
+        self.close_worker()
+        self.close_recorder()
+        self.diagnostics.close()
+        if PROFILER_FILE is not None:
+            self.profiler.export(PROFILER_FILE)
         pygame.quit()
         sys.exit()
     
@@ -78,21 +124,39 @@ class Simulation:
                 # Simulation control keys
                 elif event.key == pygame.K_SPACE:
                     self.paused = not self.paused
+                    if self.worker is not None:
+                        self.worker.set_paused(self.paused)
                     print("Paused" if self.paused else "Resumed")
                 elif event.key == pygame.K_r:
                     self.sun = Body(WIDTH/2, HEIGHT/2, 20, YELLOW, 2000, 0, 0)
-                    self.bodies = [self.sun]
+                    self.bodies = SystemState([self.sun])
+                    self.previous_positions = None
+                    self.diagnostics.reset_baseline()
+                    if self.worker is not None:
+                        self.worker.reset(self.bodies)
                     print("Simulation reset")
                 elif event.key == pygame.K_PLUS:
-                    self.timestep = round(self.timestep + 0.2,2)
-                    print(f"Simulation speed: {self.timestep}")
-                elif event.key == pygame.K_MINUS and self.timestep > 0.2:
-                    self.timestep = round(self.timestep - 0.2,2)
-                    print(f"Simulation speed: {self.timestep}")
+                    self.change_speed(0.2)
+                elif event.key == pygame.K_MINUS:
+                    self.change_speed(-0.2)
+
+                elif event.key == pygame.K_F5:
+                    self.save_scene()
+                elif event.key == pygame.K_F9:
+                    self.load_scene()
+
+                elif event.key == pygame.K_i:
+                    self.show_diagnostics = not self.show_diagnostics
+                    self.diagnostics.enabled = self.show_diagnostics or DIAGNOSTICS_FILE is not None
+                elif event.key == pygame.K_p:
+                    self.show_profiler = not self.show_profiler
+                    self.profiler.enabled = self.show_profiler or PROFILER_FILE is not None
 
                 # Switch to experimental mode
                 elif event.key == pygame.K_x:
                     self.running = False
+                    self.close_worker()
+                    self.close_recorder()
                     agent_sim = AgentSimulation()
                     agent_sim.run()
                     print("Switching to experimental mode...")
@@ -123,39 +187,104 @@ class Simulation:
                 mx, my = pygame.mouse.get_pos()
                 if self.selected_body_type == "star":
                     new_body = Body(mx, my, 20, YELLOW, 2000, 0, 0)
-                    self.bodies.append(new_body)
+                    self.add_body(new_body)
                 elif self.selected_body_type == "planet":
                     new_body = Body(mx, my, self.current_params["radius"], self.current_params["color"], self.current_params["mass"], 0, 0)
-                    self.bodies.append(new_body)
-                    new_body.set_circular_orbit(self.sun)
+                    self.add_body(new_body, orbit=True)
+
+    def add_body(self, body, orbit=False):
+        """
+        Adds a body to the system (in a circular orbit around the sun if 'orbit'),
+        or sends it to the physics worker when physics runs in the background.
+        """
+
+        if self.worker is not None:
+            self.worker.add(body, orbit)
+            return
+
+        self.bodies.append(body)
+        self.previous_positions = None # Rows changed: nothing to interpolate from
+        if orbit:
+            body.set_circular_orbit(self.sun)
+
+    def save_scene(self, path=SCENE_FILE):
+        """
+        Saves the current system to a scene file.
+        """
+
+        if self.worker is not None:
+            print("Scenes cannot be saved while physics runs in a background worker")
+            return
+        save_scene(path, self.bodies)
+        print(f"Scene saved: {path} ({len(self.bodies)} bodies)")
+
+    def load_scene(self, path=SCENE_FILE):
+        """
+        Replaces the current system with the one saved in a scene file. New planets
+        orbit the first body of the scene.
+        """
+
+        if self.worker is not None:
+            print("Scenes cannot be loaded while physics runs in a background worker")
+            return
+        try:
+            self.bodies = load_scene(path, mmap=False) # Read into memory: F5 replaces this same file
+        except (OSError, ValueError) as error:
+            print(f"Could not load scene: {error}")
+            return
+
+        if len(self.bodies):
+            self.sun = self.bodies[0]
+        self.previous_positions = None
+        self.diagnostics.reset_baseline()
+        print(f"Scene loaded: {path} ({len(self.bodies)} bodies)")
+
+    def close_worker(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+
+    def close_recorder(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
     
+    def change_speed(self, change):
+        """
+        Changes the simulation speed (relative to normal speed) by running more or
+        fewer physics steps per second. Speed never goes below 0.2.
+        """
+
+        speed = self.scheduler.steps_per_second / PHYSICS_RATE
+        speed = round(max(0.2, speed + change), 2)
+        self.scheduler.steps_per_second = speed * PHYSICS_RATE
+        if self.worker is not None:
+            self.worker.set_speed(self.scheduler.steps_per_second)
+        print(f"Simulation speed: x{speed}")
+
     def update(self):
         """
-        Applies physics and handles collisions if simulation is running.
+        Advances the simulation one physics step and handles collisions if simulation is running.
         """
 
         if not self.paused:
-            for body in self.bodies:
-                body.apply_gravity(self.bodies)
-                body.movement(self.timestep)
+            self.previous_positions = self.bodies.positions.copy()
+            with self.profiler.phase("physics"):
+                self.bodies.step(self.timestep)
             
-            # Detect and handle collisions
-            to_remove = set()
-
-            for i, body_a in enumerate(self.bodies):
-                for j, body_b in enumerate(self.bodies):
-                    
-                    # Avoid duplicate pairs and self-check
-                    if i >= j:  
-                        continue
+            # Detect and handle collisions: on collision, the second body is removed
+            with self.profiler.phase("collisions"):
+                removed = remove_collisions(self.bodies)
+                if removed:
+                    self.previous_positions = None # Removal moves rows: nothing to interpolate from
+                    print(f"Collision: {removed} bodies removed")
 
-                    # On collision, mark the second body for removal
-                    if body_a.is_colliding(body_b):
-                        print(f"Collision: {body_a} vs {body_b}")
-                        to_remove.add(body_b)
+            with self.profiler.phase("diagnostics"):
+                self.diagnostics.update(self.bodies, self.timestep)
 
-            # Remove one collided body from bodies
-            self.bodies = [body for body in self.bodies if body not in to_remove]
+            if self.recorder is not None:
+                with self.profiler.phase("recording"):
+                    self.recorder.record(self.bodies)
 
     
     def render(self):
@@ -163,8 +292,19 @@ class Simulation:
         Clears the screen, draws all bodies and the user interface.
         """
         
-        self.window.fill(BLACK)
-        for body in self.bodies:
-            body.draw(self.window)
-        draw_interface(self.window, self.selected_body_type, self.current_params)
-        pygame.display.flip()
\ No newline at end of file
+        with self.profiler.phase("draw_bodies"):
+            self.window.fill(BLACK)
+            if self.worker is not None:
+                positions, radii, colors = self.worker.snapshot()
+            else:
+                positions = interpolate_positions(self.previous_positions, self.bodies.positions, self.scheduler.alpha)
+                radii, colors = self.bodies.radii, self.bodies.colors
+            self.renderer.draw(self.window, positions, radii, colors)
+        with self.profiler.phase("draw_ui"):
+            draw_interface(self.window, self.selected_body_type, self.current_params)
+            if self.show_diagnostics:
+                draw_diagnostics(self.window, self.diagnostics)
+            if self.show_profiler:
+                draw_profiler(self.window, self.profiler)
+        with self.profiler.phase("flip"):
+            pygame.display.flip()
\ No newline at end of file
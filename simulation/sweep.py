@@ -0,0 +1,325 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from agents.checkpoint import load_checkpoint
+from agents.rl_agent import RLAgent
+from simulation.array_file import save_arrays, load_arrays
+from simulation.batch_environment import two_body_step, launch_failed
+from simulation.config import *
+
+# Columns of a parameter array: one launch per row. The planet starts at
+# LAUNCH_DISTANCE from the sun, in the direction position_angle, with the given
+# velocity and angle, like the launches of AgentSimulation.reset_episode.
+PARAMETERS = ("position_angle", "velocity", "angle", "central_mass")
+
+# Default (min, max) of every parameter in Latin hypercube sweeps (the agent's action ranges)
+DEFAULT_RANGES = ((0.0, 2 * math.pi), (0.5, 5.0), (0.0, 2 * math.pi), (SUN_MASS, SUN_MASS))
+
+
+def grid(position_angles, velocities, angles, central_masses=(SUN_MASS,)):
+    """
+    Every combination of the given values: an (N, 4) parameter array whose rows
+    follow the order of the axes, so results reshape to (positions, velocities,
+    angles, masses) maps.
+    """
+
+    axes = np.meshgrid(position_angles, velocities, angles, central_masses, indexing="ij")
+    return np.stack(axes, axis=-1).reshape(-1, len(PARAMETERS)).astype(float)
+
+
+def latin_hypercube(samples, ranges=DEFAULT_RANGES, seed=None):
+    """
+    'samples' launches spread over the parameter ranges with a Latin hypercube:
+    every range is split into 'samples' equal strata and each stratum of each
+    parameter holds exactly one launch, at a random place inside it.
+    """
+
+    rng = np.random.default_rng(seed)
+    low, high = np.array(ranges, dtype=float).T
+    strata = np.column_stack([rng.permutation(samples) for _ in ranges])
+    return low + (high - low) * (strata + rng.random((samples, len(ranges)))) / samples
+
+
+def agent_grid(agent, positions=72, central_masses=(SUN_MASS,)):
+    """
+    A grid with the velocities and angles of the actions of an RLAgent, so that
+    every launch maps exactly to one entry of its Q-table. Position angles are
+    spaced evenly around the sun, between the edges of the position bins.
+    """
+
+    velocities, angles = agent._bin_to_action(np.arange(agent.vel_bins), np.arange(agent.angle_bins))
+    position_angles = 2 * np.pi * (np.arange(positions) + 0.5) / positions
+    parameters = grid(position_angles, velocities, angles, central_masses)
+
+    # Every (velocity, angle) bin must get the launches of its own action
+    _, counts = q_values_from_sweep(agent, parameters[:, :4], np.ones(len(parameters)),
+                                    central_mass=central_masses[0])
+    per_action = counts.sum(axis=(0, 1))
+    if np.any(per_action != per_action.flat[0]) or per_action.flat[0] == 0:
+        raise ValueError("The grid launches do not map to every velocity and angle bin of the agent")
+    return parameters
+
+
+def simulate_launches(parameters, timestep=TIMESTEP, launch_distance=LAUNCH_DISTANCE):
+    """
+    Simulates every launch (rows of a parameter array) headless until it fails
+    or the episode time is up, all of them in lockstep with the same integration
+    as BatchAgentEnvironment. Returns the reward of each launch (+1 success,
+    -1 failure) and the number of frames it lasted.
+    """
+
+    parameters = np.asarray(parameters, dtype=float).reshape(-1, len(PARAMETERS))
+    position_angle, velocity, angle, central_mass = parameters.T
+    n = len(parameters)
+    max_frames = int((EPISODE_SECONDS / timestep) * 60) # Same episode length as AgentSimulation
+
+    center = np.array([WIDTH / 2, HEIGHT / 2])
+    sun_pos = np.tile(center, (n, 1))
+    sun_vel = np.zeros((n, 2))
+    planet_pos = center + launch_distance * np.column_stack((np.cos(position_angle), np.sin(position_angle)))
+    planet_vel = velocity[:, None] * np.column_stack((np.cos(angle), np.sin(angle)))
+
+    rewards = np.ones(n, dtype=np.int8)
+    frames = np.full(n, max_frames, dtype=np.int32)
+    active = np.arange(n) # Launch of each row of the state arrays
+
+    for frame in range(1, max_frames + 1):
+        if len(active) == 0:
+            break
+        two_body_step(sun_pos, sun_vel, planet_pos, planet_vel, central_mass, timestep)
+
+        failed = launch_failed(sun_pos, planet_pos)
+        if failed.any():
+            rewards[active[failed]] = -1
+            frames[active[failed]] = frame
+
+            # Only the launches still in flight are simulated from now on
+            keep = ~failed
+            active = active[keep]
+            sun_pos, sun_vel, planet_pos, planet_vel = sun_pos[keep], sun_vel[keep], planet_pos[keep], planet_vel[keep]
+            central_mass = central_mass[keep]
+
+    return rewards, frames
+
+
+def _simulate_chunk(task):
+    """
+    Worker process: simulates one chunk of a sweep.
+    """
+
+    index, parameters, timestep, launch_distance = task
+    return index, simulate_launches(parameters, timestep, launch_distance)
+
+
+class ParameterSweep:
+    """
+    Simulates a large set of launches across worker processes and streams the
+    results to a file, for stability maps of the experimental mode.
+
+    The result file (see simulation/array_file.py) is created with every array
+    at its final size: the parameters, the reward and number of frames of each
+    launch (reward 0 until it is simulated) and a flag for every chunk of
+    'chunk_size' launches. Finished chunks are written in place through a
+    memory map, and their flag is set once their results are on disk, so an
+    interrupted sweep resumes from the chunks that are not flagged yet.
+    """
+
+    def __init__(self, path, parameters=None, chunk_size=SWEEP_CHUNK, timestep=TIMESTEP,
+                 launch_distance=LAUNCH_DISTANCE, workers=None, **metadata):
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+
+        if not os.path.exists(path):
+            if parameters is None:
+                raise ValueError(f"{path} does not exist and no parameters were given")
+            parameters = np.asarray(parameters, dtype=float).reshape(-1, len(PARAMETERS))
+            save_arrays(path, {
+                "parameters": parameters,
+                "rewards": np.zeros(len(parameters), dtype=np.int8),
+                "frames": np.zeros(len(parameters), dtype=np.int32),
+                "done": np.zeros(math.ceil(len(parameters) / chunk_size), dtype=np.uint8),
+            }, {
+                "columns": PARAMETERS,
+                "chunk_size": chunk_size,
+                "timestep": timestep,
+                "launch_distance": launch_distance,
+                "episode_seconds": EPISODE_SECONDS,
+                **metadata,
+            })
+        elif parameters is not None and not np.array_equal(load_sweep(path)[0], parameters):
+            raise ValueError(f"{path} holds a sweep of other parameters")
+
+        self.arrays, self.metadata = load_arrays(path, mmap_mode="r+")
+        self.chunk_size = self.metadata["chunk_size"]
+
+    def __len__(self):
+        return len(self.arrays["parameters"])
+
+    def remaining_chunks(self):
+        """
+        Indices of the chunks that are not simulated yet.
+        """
+        return np.flatnonzero(self.arrays["done"] == 0)
+
+    def run(self, max_chunks=None, progress=None):
+        """
+        Simulates the remaining chunks (at most max_chunks) and writes each one to
+        the file as soon as it finishes, calling progress(done, total) after each.
+        Returns the number of chunks simulated.
+        """
+
+        chunks = self.remaining_chunks()[:max_chunks]
+        if len(chunks) == 0:
+            return 0
+
+        parameters = self.arrays["parameters"]
+        tasks = ((index, np.array(parameters[index * self.chunk_size:(index + 1) * self.chunk_size]),
+                  self.metadata["timestep"], self.metadata["launch_distance"]) for index in chunks)
+
+        if self.workers == 1:
+            self._store(map(_simulate_chunk, tasks), progress)
+        else:
+            with multiprocessing.Pool(min(self.workers, len(chunks))) as pool:
+                self._store(pool.imap_unordered(_simulate_chunk, tasks), progress)
+        return len(chunks)
+
+    def _store(self, results, progress):
+        done = self.arrays["done"]
+        for index, (rewards, frames) in results:
+            rows = slice(index * self.chunk_size, (index + 1) * self.chunk_size)
+            self.arrays["rewards"][rows] = rewards
+            self.arrays["frames"][rows] = frames
+            self.arrays["rewards"].flush() # Results reach the file before their chunk is flagged
+            done[index] = 1
+            done.flush()
+            if progress is not None:
+                progress(int(np.count_nonzero(done)), len(done))
+
+
+def load_sweep(path):
+    """
+    The parameters, rewards and frames of a sweep file (memory-mapped, read-only)
+    and its metadata. Launches not simulated yet have reward 0.
+    """
+
+    arrays, metadata = load_arrays(path)
+    return arrays["parameters"], arrays["rewards"], arrays["frames"], metadata
+
+
+def q_values_from_sweep(agent, parameters, rewards, central_mass=SUN_MASS, launch_distance=LAUNCH_DISTANCE):
+    """
+    Maps the simulated launches around a sun of 'central_mass' to the entries of
+    an RLAgent's Q-table (the position bin of the launch and the nearest velocity
+    and angle bins). Returns the mean reward of the launches of every entry (the
+    success probability scaled to [-1, 1]) and their number, both shaped like the
+    Q-table.
+    """
+
+    parameters = np.asarray(parameters, dtype=float)
+    rewards = np.asarray(rewards)
+    used = (rewards != 0) & np.isclose(parameters[:, 3], central_mass)
+    position_angle, velocity, angle, _ = parameters[used].T
+
+    px_bin, py_bin = agent.discretize_position_batch(launch_distance * np.cos(position_angle),
+                                                     launch_distance * np.sin(position_angle))
+    v_min, v_max = agent.vel_range
+    a_min, a_max = agent.angle_range
+    v_bin = np.clip(np.rint((velocity - v_min) / (v_max - v_min) * (agent.vel_bins - 1)), 0, agent.vel_bins - 1)
+    a_bin = np.clip(np.rint((angle - a_min) / (a_max - a_min) * (agent.angle_bins - 1)), 0, agent.angle_bins - 1)
+
+    entries = np.ravel_multi_index((px_bin, py_bin, v_bin.astype(int), a_bin.astype(int)), agent.q_table.shape)
+    counts = np.bincount(entries, minlength=agent.q_table.size)
+    sums = np.bincount(entries, weights=rewards[used], minlength=agent.q_table.size)
+    values = sums / np.maximum(counts, 1)
+    return values.reshape(agent.q_table.shape), counts.reshape(agent.q_table.shape)
+
+
+def seed_q_table(agent, parameters, rewards, **kwargs):
+    """
+    Initializes the Q-table entries covered by a sweep with the mean reward of
+    their launches, so the agent starts from the known stability map instead of
+    zeros. Returns the number of entries set.
+    """
+
+    values, counts = q_values_from_sweep(agent, parameters, rewards, **kwargs)
+    seeded = counts > 0
+    agent.q_table[seeded] = values[seeded]
+    return int(np.count_nonzero(seeded))
+
+
+def validate_agent(agent, parameters, rewards, **kwargs):
+    """
+    Compares the greedy policy of an RLAgent with a sweep. For the position bins
+    whose greedy action was simulated, returns the success rate of the greedy
+    actions and the best success rate of any action of those bins.
+    """
+
+    values, counts = q_values_from_sweep(agent, parameters, rewards, **kwargs)
+    positions = agent.pos_bins * agent.pos_bins
+    values = values.reshape(positions, -1)
+    counts = counts.reshape(positions, -1)
+
+    greedy = np.argmax(agent.q_table.reshape(positions, -1), axis=1)
+    covered = counts[np.arange(positions), greedy] > 0
+    success = (values + 1) / 2
+    success[counts == 0] = 0
+    return {
+        "position_bins": int(np.count_nonzero(covered)),
+        "greedy_success_rate": float(success[np.arange(positions), greedy][covered].mean()) if covered.any() else 0.0,
+        "best_success_rate": float(success.max(axis=1)[covered].mean()) if covered.any() else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python -m simulation.sweep stability.sweep --grid 72,10,12 --masses 1000,2000,4000
+    #        python -m simulation.sweep lhs.sweep --samples 1000000 --mass-range 1000,4000 --seed 1
+    parser = argparse.ArgumentParser(description="Simulate a sweep of experimental-mode launches (resumes if the file exists).")
+    parser.add_argument("output")
+    parser.add_argument("--grid", default="72,10,12", metavar="P,V,A",
+                        help="position angles, and velocity and angle bins of a Q-table agent, of a regular grid of its actions")
+    parser.add_argument("--masses", default=str(SUN_MASS), help="comma separated central masses of the grid")
+    parser.add_argument("--samples", type=int, default=0, metavar="N",
+                        help="Latin hypercube of N launches instead of a grid")
+    parser.add_argument("--mass-range", default=f"{SUN_MASS},{SUN_MASS}", metavar="MIN,MAX",
+                        help="central mass range of the Latin hypercube")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=SWEEP_CHUNK, help="launches per chunk")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--validate", default=None, metavar="CHECKPOINT",
+                        help="compare the greedy policy of a Q-table agent checkpoint with the results")
+    args = parser.parse_args()
+
+    parameters = None
+    if not os.path.exists(args.output):
+        if args.samples:
+            mass_range = tuple(float(m) for m in args.mass_range.split(","))
+            parameters = latin_hypercube(args.samples, DEFAULT_RANGES[:3] + (mass_range,), seed=args.seed)
+            metadata = {"design": "latin_hypercube", "seed": args.seed}
+        else:
+            p, v, a = (int(count) for count in args.grid.split(","))
+            masses = [float(m) for m in args.masses.split(",")]
+            parameters = agent_grid(RLAgent(vel_bins=v, angle_bins=a), positions=p, central_masses=masses)
+            metadata = {"design": "grid", "shape": [p, v, a, len(masses)]}
+    else:
+        metadata = {}
+
+    sweep = ParameterSweep(args.output, parameters, chunk_size=args.chunk, workers=args.workers, **metadata)
+    start = time.perf_counter()
+    simulated = sweep.run(progress=lambda done, total: print(f"\rChunks: {done} / {total}", end="", flush=True))
+    elapsed = time.perf_counter() - start
+    if simulated:
+        print()
+
+    _, rewards, _, _ = load_sweep(args.output)
+    timing = f" ({simulated} chunks in {elapsed:.1f} s)" if simulated else ""
+    print(f"{len(sweep)} launches, {np.count_nonzero(rewards)} simulated{timing}, "
+          f"success rate {np.mean(rewards == 1) * 100:.1f}%")
+
+    if args.validate:
+        agent, _ = load_checkpoint(args.validate)
+        parameters, rewards, _, _ = load_sweep(args.output)
+        for name, value in validate_agent(agent, parameters, rewards).items():
+            print(f"{name}: {value}")
@@ -0,0 +1,254 @@
+import numpy as np
+from simulation.barnes_hut import calculate_barnes_hut_accelerations
+from simulation.body import Body, BodyStorage
+from simulation.integrators import make_integrator
+from simulation.backend import numba_kernels, resolve_backend
+from simulation.config import *
+from simulation.physics import *
+
+
+class SystemState(BodyStorage):
+    """
+    Struct-of-arrays state of a whole planetary system. Every body is a row of the
+    shared position, velocity, acceleration, mass, radius and color arrays, so
+    gravity and movement are computed for all bodies at once with NumPy.
+
+    It behaves like the list of bodies it replaces: it can be iterated, indexed,
+    measured with len() and extended with append(). The Body objects it returns
+    are views into its arrays.
+
+    Rows in use are always the first 'count' ones. Removing bodies moves the last
+    rows into the freed ones (swap-remove), so the rows past 'count' act as a free
+    list: adding and removing bodies reuses them and only allocates when the
+    capacity is exceeded. Row order is therefore not insertion order; 'serials'
+    keeps, for every body, the order in which it was added.
+    """
+
+    fields = BodyStorage.fields + ("_serial",)
+
+    def __init__(self, bodies=(), capacity=16, gravity_solver=GRAVITY_SOLVER, theta=BARNES_HUT_THETA,
+                 integrator=INTEGRATOR, backend=BACKEND, softening=SOFTENING):
+        super().__init__(max(1, capacity))
+        self._serial = np.zeros(self.capacity, dtype=np.int64)
+        self.count = 0 # Number of rows in use
+        self.next_serial = 0 # Serial number of the next body added
+        self._handles = [None] * self.capacity # Body view of each row (created on demand)
+
+        self.gravity_solver = gravity_solver # "direct" or "barnes_hut"
+        self.theta = theta # Barnes-Hut opening angle
+        self.softening = softening # Gravitational softening length (0 = exact Newtonian gravity)
+        self.integrator = make_integrator(integrator)
+        self.backend = resolve_backend(backend) # "numpy" or "numba" kernels
+        self.forces_stale = True # Accelerations do not match the current bodies
+
+        for body in bodies:
+            self.append(body)
+
+    @classmethod
+    def from_arrays(cls, positions, velocities, masses, radii, colors, **options):
+        """
+        Creates a system with one body per row of the given arrays. Arrays that
+        already have the storage dtype and layout are used as they are, without
+        copying (e.g. copy-on-write memory-mapped arrays of a saved scene).
+        """
+
+        system = cls(capacity=1, **options)
+        n = len(masses)
+        system._pos = np.require(positions, np.float64, ("C", "W"))
+        system._vel = np.require(velocities, np.float64, ("C", "W"))
+        system._acc = np.zeros((n, 2))
+        system._mass = np.require(masses, np.float64, ("C", "W"))
+        system._radius = np.require(radii, np.float64, ("C", "W"))
+        system._color = np.require(colors, np.uint8, ("C", "W"))
+        system._serial = np.arange(n, dtype=np.int64)
+        system._handles = [None] * n
+        system.count = n
+        system.next_serial = n
+        return system
+
+    # Live views of the arrays (only the rows in use)
+    @property
+    def positions(self):
+        return self._pos[:self.count]
+
+    @property
+    def velocities(self):
+        return self._vel[:self.count]
+
+    @property
+    def accelerations(self):
+        return self._acc[:self.count]
+
+    @property
+    def masses(self):
+        return self._mass[:self.count]
+
+    @property
+    def radii(self):
+        return self._radius[:self.count]
+
+    @property
+    def colors(self):
+        return self._color[:self.count]
+
+    @property
+    def serials(self):
+        return self._serial[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("body index out of range")
+
+        body = self._handles[index]
+        if body is None:
+            body = Body.view(self, index)
+            self._handles[index] = body
+        return body
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def append(self, body):
+        """
+        Adds a body to the system. Its values are copied into the system arrays
+        and the body becomes a view of its new row.
+        """
+
+        if self.count == self.capacity:
+            self._grow(max(16, 2 * self.capacity))
+
+        index = self.count
+        self.copy_row(index, body._system, body._index)
+        self._serial[index] = self.next_serial
+        self.next_serial += 1
+        body._system = self
+        body._index = index
+        self._handles[index] = body
+        self.count += 1
+        self.forces_stale = True
+
+    def remove(self, bodies):
+        """
+        Removes the given bodies from the system. Removed bodies keep their last
+        values in a private storage.
+        """
+
+        keep = np.ones(self.count, dtype=bool)
+        for body in bodies:
+            if body._system is self:
+                keep[body._index] = False
+        self.remove_rows(keep)
+
+    def remove_rows(self, keep):
+        """
+        Removes the rows where the boolean mask 'keep' is False. Each freed row
+        below the new count is filled with one of the kept rows past it, so only
+        as many rows as were removed are moved.
+        """
+
+        if keep.all():
+            return
+
+        removed = np.flatnonzero(~keep)
+        for index in removed:
+            body = self._handles[index]
+            if body is not None:
+                body.detach()
+                self._handles[index] = None
+
+        remaining = self.count - len(removed)
+        holes = removed[removed < remaining]
+        movers = remaining + np.flatnonzero(keep[remaining:])
+
+        for name in self.fields:
+            array = getattr(self, name)
+            array[holes] = array[movers]
+
+        handles = self._handles
+        for hole, mover in zip(holes.tolist(), movers.tolist()):
+            body = handles[mover]
+            handles[hole] = body
+            handles[mover] = None
+            if body is not None:
+                body._index = hole
+        self.count = remaining
+        self.forces_stale = True
+
+    def _grow(self, capacity):
+        """
+        Reallocates the arrays with a bigger capacity, keeping the current rows.
+        """
+
+        for name in self.fields:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self._handles.extend([None] * (capacity - len(self._handles)))
+
+    def calculate_accelerations(self, positions, out=None, rows=None):
+        """
+        Returns the gravitational accelerations of the bodies of this system if they
+        were at the given positions, using the configured gravity solver. With
+        'rows', only the accelerations of those bodies are computed (one row each).
+        """
+
+        if self.gravity_solver == "direct":
+            if self.backend == "numba":
+                positions = np.ascontiguousarray(positions)
+                if rows is not None:
+                    rows = np.asarray(rows, dtype=np.int64)
+                    out = np.empty((len(rows), 2)) if out is None else out
+                    return numba_kernels.gravity_accelerations_of(G, rows, positions, self.masses, out, self.softening)
+                out = np.empty((len(positions), 2)) if out is None else out
+                return numba_kernels.gravity_accelerations(G, positions, self.masses, out, self.softening)
+            return calculate_gravity_accelerations(G, positions, self.masses, out=out, softening=self.softening, rows=rows)
+        if self.gravity_solver == "barnes_hut":
+            return calculate_barnes_hut_accelerations(G, positions, self.masses, self.theta, out=out,
+                                                      softening=self.softening, rows=rows)
+        raise ValueError(f"Unknown gravity solver: {self.gravity_solver}")
+
+    def encounter_times(self, rows=None):
+        """
+        Shortest free-fall time of each body (of 'rows') to any other body of the
+        system (see calculate_encounter_times).
+        """
+
+        if self.backend == "numba":
+            rows = np.arange(len(self), dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+            return numba_kernels.encounter_times_of(G, rows, np.ascontiguousarray(self.positions), self.masses,
+                                                    np.empty(len(rows)), self.softening)
+        return calculate_encounter_times(G, self.positions, self.masses, self.softening, rows)
+
+    def apply_gravity(self):
+        """
+        Updates the acceleration of every body based on the gravitational
+        attraction of all the others.
+        """
+
+        self.calculate_accelerations(self.positions, out=self.accelerations)
+        self.forces_stale = False
+
+    def movement(self, timestep):
+        """
+        Updates the position and velocity of every body based on its acceleration.
+        """
+
+        positions = self.positions
+        velocities = self.velocities
+        velocities += self.accelerations * timestep
+        positions += velocities * timestep
+        self.forces_stale = True
+
+    def step(self, timestep):
+        """
+        Advances the whole system by one timestep with the configured integrator.
+        """
+
+        self.integrator.step(self, timestep)
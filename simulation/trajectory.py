@@ -0,0 +1,174 @@
+import struct
+import zlib
+import numpy as np
+from simulation.config import *
+
+# File layout:
+#   file header   magic, version, timestep
+#   chunks        chunk header (magic, frames, bodies, compressed size) + zlib data
+#   index         first frame and offset of every chunk, then the index footer
+# A chunk holds 'chunk_frames' consecutive frames: the label and the number of
+# bodies of each frame, then positions (float32), radii (float32) and colors (uint8)
+# of all their bodies. The index is written on close; files from an interrupted
+# recording are still readable by walking the chunk headers.
+FILE_HEADER = struct.Struct("<8sId")
+CHUNK_HEADER = struct.Struct("<4sIIQ")
+INDEX_FOOTER = struct.Struct("<QQ8s")
+FILE_MAGIC = b"STLRTRAJ"
+CHUNK_MAGIC = b"CHNK"
+INDEX_MAGIC = b"TRAJINDX"
+VERSION = 1
+
+
+class TrajectoryRecorder:
+    """
+    Streams the bodies of a system (positions, radii and colors) to a chunked,
+    compressed trajectory file, one frame per record() call. Frames are buffered
+    and written a chunk at a time, so memory use does not grow with the length of
+    the recording. Each frame may carry an integer label (e.g. the episode number).
+    """
+
+    def __init__(self, path, timestep=TIMESTEP, chunk_frames=TRAJECTORY_CHUNK_FRAMES, level=1):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.level = level # zlib compression level
+        self.frames = 0
+        self.chunks = [] # (first frame, offset) of every chunk written
+        self._pending = [] # Frames of the chunk being filled
+
+        self._file = open(path, "wb")
+        self._file.write(FILE_HEADER.pack(FILE_MAGIC, VERSION, timestep))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, system, label=0):
+        """
+        Adds a frame with the current bodies of a SystemState.
+        """
+
+        self._pending.append((label, system.positions.astype(np.float32), system.radii.astype(np.float32),
+                              system.colors.copy()))
+        self.frames += 1
+        if len(self._pending) == self.chunk_frames:
+            self._write_chunk()
+
+    def close(self):
+        """
+        Writes the last (partial) chunk and the chunk index.
+        """
+
+        if self._file is None:
+            return
+        if self._pending:
+            self._write_chunk()
+
+        index_offset = self._file.tell()
+        index = np.array(self.chunks, dtype=np.int64).reshape(-1, 2)
+        self._file.write(index.tobytes())
+        self._file.write(INDEX_FOOTER.pack(index_offset, len(index), INDEX_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def _write_chunk(self):
+        labels, positions, radii, colors = zip(*self._pending)
+        counts = np.array([len(frame) for frame in radii], dtype=np.int32)
+        raw = b"".join((np.array(labels, dtype=np.int64).tobytes(), counts.tobytes(),
+                        np.concatenate(positions).tobytes(), np.concatenate(radii).tobytes(),
+                        np.concatenate(colors).tobytes()))
+        data = zlib.compress(raw, self.level)
+
+        self.chunks.append((self.frames - len(self._pending), self._file.tell()))
+        self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(counts), int(counts.sum()), len(data)))
+        self._file.write(data)
+        self._file.flush()
+        self._pending = []
+
+
+class TrajectoryReader:
+    """
+    Random access to the frames of a trajectory file. The file is memory-mapped:
+    reading a frame only touches (and decompresses) the chunk that contains it, and
+    the last decompressed chunk is kept so playing frames in order stays cheap.
+    """
+
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, self.timestep = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported trajectory version: {version}")
+
+        self.first_frames, self.offsets = self._read_index()
+        self.frames = 0
+        if len(self.offsets):
+            _, last_frames, _, _ = CHUNK_HEADER.unpack_from(self.data, int(self.offsets[-1]))
+            self.frames = int(self.first_frames[-1]) + last_frames
+
+        self._chunk = None # (chunk number, decoded frames)
+
+    def __len__(self):
+        return self.frames
+
+    def _read_index(self):
+        """
+        First frame and offset of every chunk, from the index or (if the recording
+        was interrupted before it was written) from the chunk headers.
+        """
+
+        if len(self.data) >= FILE_HEADER.size + INDEX_FOOTER.size:
+            index_offset, chunks, magic = INDEX_FOOTER.unpack_from(self.data, len(self.data) - INDEX_FOOTER.size)
+            if magic == INDEX_MAGIC:
+                index = self.data[index_offset:index_offset + 16 * chunks].view(np.int64).reshape(-1, 2)
+                return index[:, 0], index[:, 1]
+
+        first_frames = []
+        offsets = []
+        offset = FILE_HEADER.size
+        frames = 0
+        while offset + CHUNK_HEADER.size <= len(self.data):
+            magic, chunk_frames, _, size = CHUNK_HEADER.unpack_from(self.data, offset)
+            if magic != CHUNK_MAGIC or offset + CHUNK_HEADER.size + size > len(self.data):
+                break
+            first_frames.append(frames)
+            offsets.append(offset)
+            frames += chunk_frames
+            offset += CHUNK_HEADER.size + size
+        return np.array(first_frames, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+    def frame(self, number):
+        """
+        Returns (positions, radii, colors, label) of the given frame.
+        """
+
+        if not 0 <= number < self.frames:
+            raise IndexError("frame out of range")
+
+        chunk = int(np.searchsorted(self.first_frames, number, side="right")) - 1
+        if self._chunk is None or self._chunk[0] != chunk:
+            self._chunk = (chunk, self._decode(chunk))
+        return self._chunk[1][number - int(self.first_frames[chunk])]
+
+    def _decode(self, chunk):
+        offset = int(self.offsets[chunk])
+        _, frames, bodies, size = CHUNK_HEADER.unpack_from(self.data, offset)
+        start = offset + CHUNK_HEADER.size
+        raw = zlib.decompress(self.data[start:start + size])
+
+        labels = np.frombuffer(raw, np.int64, frames, 0)
+        position = labels.nbytes
+        counts = np.frombuffer(raw, np.int32, frames, position)
+        position += counts.nbytes
+        positions = np.frombuffer(raw, np.float32, 2 * bodies, position).reshape(bodies, 2)
+        position += positions.nbytes
+        radii = np.frombuffer(raw, np.float32, bodies, position)
+        position += radii.nbytes
+        colors = np.frombuffer(raw, np.uint8, 3 * bodies, position).reshape(bodies, 3)
+
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        return [(positions[a:b], radii[a:b], colors[a:b], int(label))
+                for a, b, label in zip(bounds[:-1], bounds[1:], labels)]
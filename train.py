@@ -0,0 +1,173 @@
+import argparse
+import json
+import time
+from agents.checkpoint import save_checkpoint, load_or_create
+from agents.parallel_trainer import ParallelTrainer
+from agents.rl_agent import RLAgent
+from agents.tile_agent import TileCodingAgent
+from simulation.agent_environment import AgentSimulation
+from simulation.batch_environment import BatchAgentEnvironment
+from simulation.sweep import load_sweep, seed_q_table
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the StellarSim RL agent without a window.")
+    parser.add_argument("--episodes", type=int, default=1000, help="number of episodes to train")
+    parser.add_argument("--render-every", type=int, default=0, metavar="K",
+                        help="show one episode every K episodes in a window (0 = never)")
+    parser.add_argument("--lanes", type=int, default=0, metavar="M",
+                        help="simulate M episodes at once in a batched environment (0 = one at a time)")
+    parser.add_argument("--workers", type=int, default=0, metavar="W",
+                        help="train with W worker processes, each with its own batched environment (0 = no workers)")
+    parser.add_argument("--predict", action="store_true",
+                        help="end episodes whose outcome is certain from the initial orbit without simulating them")
+    parser.add_argument("--seed", type=int, default=None, help="random seed of the batched environment and workers")
+    parser.add_argument("--agent", choices=("table", "tiles"), default="table",
+                        help="Q-table agent, or tile-coding agent with continuous velocity and angle")
+    parser.add_argument("--batch-size", type=int, default=1, metavar="B",
+                        help="Q-table agent: learn from the outcomes of B episodes at once (1 = after every episode)")
+    parser.add_argument("--replay", type=int, default=0, metavar="N",
+                        help="Q-table agent: learn again from N random past episodes after each batch (experience replay)")
+    parser.add_argument("--profile", default=None, metavar="FILE",
+                        help="save per-phase timings (.json or .csv) when training one episode at a time")
+    parser.add_argument("--record", default=None, metavar="FILE",
+                        help="record every simulated step to a trajectory file when training one episode at a time")
+    parser.add_argument("--checkpoint", default=None, metavar="FILE",
+                        help="resume from this checkpoint if it exists, and save the agent to it during training")
+    parser.add_argument("--checkpoint-every", type=int, default=10000, metavar="N",
+                        help="episodes between checkpoints")
+    parser.add_argument("--sweep", default=None, metavar="FILE",
+                        help="initialize the Q-table of a new agent from a parameter sweep (see simulation.sweep)")
+    parser.add_argument("--stats", default="training_stats.json", help="file where training statistics are saved")
+    args = parser.parse_args()
+    if args.render_every and (args.lanes > 0 or args.workers > 0):
+        parser.error("--render-every needs one episode at a time (no --lanes or --workers)")
+    if args.profile and (args.lanes > 0 or args.workers > 0):
+        parser.error("--profile needs one episode at a time (no --lanes or --workers)")
+    if args.record and (args.lanes > 0 or args.workers > 0):
+        parser.error("--record needs one episode at a time (no --lanes or --workers)")
+    if args.agent == "tiles" and args.workers > 0:
+        parser.error("--workers merges Q-tables and needs --agent table")
+    if args.agent == "tiles" and args.predict:
+        parser.error("--predict memoizes discrete actions and needs --agent table")
+    if args.agent == "tiles" and (args.batch_size != 1 or args.replay):
+        parser.error("--batch-size and --replay need --agent table")
+    if args.agent == "tiles" and args.sweep:
+        parser.error("--sweep seeds a Q-table and needs --agent table")
+    return args
+
+
+AGENTS = {"table": RLAgent, "tiles": TileCodingAgent}
+
+
+def make_agent(args):
+    """
+    The agent selected with --agent and its reward metrics: resumed from the
+    checkpoint if there is one, new otherwise (seeded from --sweep if given).
+    """
+
+    agent, metrics = load_or_create(args.checkpoint, lambda: AGENTS[args.agent](seed=args.seed), seed=args.seed)
+    if not isinstance(agent, AGENTS[args.agent]):
+        raise SystemExit(f"{args.checkpoint} holds a {type(agent).__name__}, not an --agent {args.agent} agent")
+    if isinstance(agent, RLAgent):
+        if args.batch_size > agent.experience.capacity:
+            raise SystemExit(f"--batch-size cannot exceed the {agent.experience.capacity} experiences the agent keeps")
+        agent.batch_size = args.batch_size
+        agent.replay_samples = args.replay
+    if args.sweep and metrics.episodes == 0:
+        # Only new agents start from the sweep; resumed ones keep what they learned
+        parameters, rewards, _, _ = load_sweep(args.sweep)
+        seed_q_table(agent, parameters, rewards)
+    return agent, metrics
+
+
+def training_rounds(args, agent, metrics):
+    """
+    Splits the training into rounds of --checkpoint-every episodes (or a single
+    round without --checkpoint). Yields the episodes of each round, and saves a
+    checkpoint after each one.
+    """
+
+    round_episodes = args.checkpoint_every if args.checkpoint else args.episodes
+    remaining = args.episodes
+    while remaining > 0:
+        episodes = min(round_episodes, remaining)
+        yield episodes
+        remaining -= episodes
+        if args.checkpoint:
+            save_checkpoint(args.checkpoint, agent, metrics)
+
+
+def train_single(args, agent, metrics):
+    """
+    Trains with the experimental mode simulation, one episode at a time.
+    """
+
+    sim = AgentSimulation(headless=True, predict_outcomes=args.predict, record=args.record, agent=agent, checkpoint=None)
+    sim.metrics = metrics
+    sim.profiler.enabled = args.profile is not None
+    for episodes in training_rounds(args, agent, metrics):
+        sim.train(episodes, render_every=args.render_every)
+    sim.close_recorder()
+    if args.profile is not None:
+        sim.profiler.export(args.profile)
+    return sim.agent, sim.metrics
+
+
+def train_batched(args, agent, metrics):
+    """
+    Trains with M episodes simulated in lockstep.
+    """
+
+    env = BatchAgentEnvironment(agent, lanes=args.lanes, seed=args.seed, predict_outcomes=args.predict)
+    env.metrics = metrics
+    for episodes in training_rounds(args, agent, metrics):
+        env.run(episodes)
+    return env.agent, env.metrics
+
+
+def train_parallel(args, agent, metrics):
+    """
+    Trains with several worker processes whose Q-table changes are merged periodically.
+    """
+
+    with ParallelTrainer(agent, workers=args.workers, lanes=args.lanes or 256, seed=args.seed,
+                         predict_outcomes=args.predict, metrics=metrics) as trainer:
+        for episodes in training_rounds(args, agent, metrics):
+            trainer.train(episodes)
+    return trainer.agent, trainer.metrics
+
+
+def main():
+    args = parse_args()
+    agent, metrics = make_agent(args)
+    resumed = metrics.episodes # Episodes of the run resumed from the checkpoint
+
+    start = time.perf_counter()
+    if args.workers > 0:
+        agent, metrics = train_parallel(args, agent, metrics)
+    elif args.lanes > 0:
+        agent, metrics = train_batched(args, agent, metrics)
+    else:
+        agent, metrics = train_single(args, agent, metrics)
+    elapsed = time.perf_counter() - start
+    trained = metrics.episodes - resumed
+
+    stats = {
+        **metrics.summary(),
+        "resumed_episodes": resumed,
+        "elapsed_seconds": elapsed,
+        "episodes_per_second": trained / elapsed if elapsed > 0 else 0.0,
+        "final_epsilon": agent.epsilon,
+        "recent_rewards": metrics.recent().tolist(),
+        "series": metrics.time_series(),
+    }
+    with open(args.stats, "w") as f:
+        json.dump(stats, f, indent=2)
+
+    print(f"Trained {trained} episodes in {elapsed:.1f}s ({stats['episodes_per_second']:.1f} episodes/s)")
+    print(f"Success rate: {stats['success_rate'] * 100:.1f}% - statistics saved to {args.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,168 @@
 import pygame
-from simulation.config import WHITE
+from simulation.config import WHITE, WIDTH, HEIGHT
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (text, color), so labels that do not change
+    between frames are rendered only once. The font is loaded the first time it is
+    needed (looking up a system font is slow), and the least recently used surfaces
+    are dropped once 'max_size' are stored.
+
+    Panels (several lines of text composited onto one transparent surface) are
+    cached the same way, keyed by their lines.
+    """
+
+    def __init__(self, font_name="consolas", size=18, max_size=256):
+        self.font_name = font_name
+        self.size = size
+        self.max_size = max_size
+        self._font = None
+        self.surfaces = {} # (text, color) -> surface, least recently used first
+        self.panels = {} # (lines, color, spacing) -> surface
+
+    @property
+    def font(self):
+        if self._font is None:
+            self._font = pygame.font.SysFont(self.font_name, self.size)
+        return self._font
+
+    def render(self, text, color=WHITE):
+        """
+        Surface with the given text (rendered only if it is not cached).
+        """
+
+        return self._cached(self.surfaces, (text, tuple(color)),
+                            lambda: self.font.render(text, True, color))
+
+    def panel(self, lines, color=WHITE, spacing=25):
+        """
+        Surface with the given lines of text, one every 'spacing' pixels.
+        """
+
+        lines = tuple(lines)
+        return self._cached(self.panels, (lines, tuple(color), spacing),
+                            lambda: self._composite(lines, color, spacing))
+
+    def clear(self):
+        self.surfaces.clear()
+        self.panels.clear()
+
+    def _composite(self, lines, color, spacing):
+        labels = [self.render(line, color) for line in lines]
+        width = max((label.get_width() for label in labels), default=0)
+        surface = pygame.Surface((max(width, 1), max(spacing * len(labels), 1)), pygame.SRCALPHA)
+        for i, label in enumerate(labels):
+            surface.blit(label, (0, i * spacing))
+        return surface
+
+    def _cached(self, store, key, make):
+        surface = store.pop(key, None)
+        if surface is None:
+            surface = make()
+            if len(store) >= self.max_size:
+                del store[next(iter(store))]
+        store[key] = surface # (Re)inserted last: most recently used
+        return surface
+
+
+# Shared by every screen
+text_cache = TextCache()
+
+CONTROLS_TEXT = (
+    "Controls:",
+    "",
+    "1 = Star, 2 = Planet",
+    "Q/E = Select color",
+    "W/S = Select mass",
+    "A/D = Select radius",
+    "Click = Add body",
+    "",
+    "Space = Pause/Resume",
+    "+/- = Change speed",
+    "R = Reset simulation",
+    "F5/F9 = Save/Load scene",
+    "I = Diagnostics",
+    "P = Profiler",
+)
+
+# Settings panel of the last parameters drawn: ((type, params), surface)
+_params_panel = (None, None)
+
+
+def draw_controls(surface, lines=CONTROLS_TEXT):
+    """
+    Draws a controls panel (pre-composited once) at the top right.
+    """
+
+    surface.blit(text_cache.panel(lines), (780, 10))
+
 
 # Basic UI
 def draw_interface(surface, selected_body_type, current_params):
     """
     Renders the user interface on the given surface, showing current settings and controls.
     """
-    
-    font = pygame.font.SysFont("consolas", 18)
 
-    # Display selected type
-    text = font.render(f"Selected type: {selected_body_type}", True, WHITE)
-    surface.blit(text, (10, 10))
+    global _params_panel
+
+    # Selected type and params (mass, radius, color), rebuilt only when they change
+    key = (selected_body_type, tuple(current_params.items()))
+    if _params_panel[0] != key:
+        title = text_cache.render(f"Selected type: {selected_body_type}")
+        lines = []
+        for name, value in current_params.items():
+            if name != "color":
+                lines.append(f"{name.capitalize()}: {value}")
+            else:
+                lines.append(f"{name.capitalize()}:")
+        params = text_cache.panel(lines)
 
-    # Display params: mass, radius, color
-    y_offset = 40
-    for key, value in current_params.items():
-        if key != "color":
-            label = font.render(f"{key.capitalize()}: {value}", True, WHITE)
-        else:
-            label = font.render(f"{key.capitalize()}:", True, WHITE)
-        surface.blit(label, (10, y_offset))
-        y_offset += 25
+        panel = pygame.Surface((max(title.get_width(), params.get_width()), 30 + params.get_height()), pygame.SRCALPHA)
+        panel.blit(title, (0, 0))
+        panel.blit(params, (0, 30))
+        _params_panel = (key, panel)
+    surface.blit(_params_panel[1], (10, 10))
 
     # Color preview rectangle next to "Color:" label
     pygame.draw.rect(surface, current_params["color"], pygame.Rect(75, 90, 40, 20))
 
     # Controls panel
-    controls_y = 10
-    controls_text = [
-        "Controls:",
-        "",
-        "1 = Star, 2 = Planet",
-        "Q/E = Select color",
-        "W/S = Select mass",
-        "A/D = Select radius",
-        "Click = Add body",
-        "",
-        "Space = Pause/Resume",
-        "+/- = Change speed",
-        "R = Reset simulation"
-    ]
-
-    for line in controls_text:
-        control_label = font.render(line, True, WHITE)
-        surface.blit(control_label, (780, controls_y))
-        controls_y += 25
\ No newline at end of file
+    draw_controls(surface)
+
+def draw_diagnostics(surface, diagnostics):
+    """
+    Renders the latest conservation diagnostics (energy and momentum drift) at the bottom left.
+    """
+
+    sample = diagnostics.latest
+
+    if sample is None:
+        lines = ["Diagnostics: measuring..."]
+    else:
+        lines = [
+            f"Energy: K={sample['kinetic']:.4g} U={sample['potential']:.4g} E={sample['energy']:.6g}",
+            f"Energy drift: {sample['energy_drift']:.2e}",
+            f"Momentum drift: {sample['momentum_drift']:.2e}",
+            f"Angular momentum drift: {sample['angular_momentum_drift']:.2e}",
+        ]
+
+    # Only changes when a new sample is taken
+    surface.blit(text_cache.panel(lines), (10, HEIGHT - 10 - 25 * len(lines)))
+
+def draw_profiler(surface, profiler):
+    """
+    Renders the rolling p50/p95/p99 time of every phase of the main loop at the bottom right.
+    """
+
+    font = text_cache.font
+    report = profiler.summary()
+
+    # The header is cached, the timings change every frame
+    y = HEIGHT - 10 - 25 * (len(report) + 1)
+    header = text_cache.render(f"{'phase':<12}{'p50':>7}{'p95':>7}{'p99':>7} ms")
+    surface.blit(header, (WIDTH - 10 - header.get_width(), y))
+    for name, row in report.items():
+        y += 25
+        label = font.render(f"{name:<12}{row['p50_ms']:>7.2f}{row['p95_ms']:>7.2f}{row['p99_ms']:>7.2f}", True, WHITE)
+        surface.blit(label, (WIDTH - 10 - label.get_width(), y))
@@ -0,0 +1,97 @@
+import numpy as np
+import pygame
+from simulation.config import WIDTH, HEIGHT
+
+
+class BodyRenderer:
+    """
+    Draws all the bodies of a system at once from its arrays.
+
+    - Bodies entirely outside the window are skipped.
+    - Each (radius, color) pair is drawn once into a sprite that is reused every
+      frame, and all sprites are blitted in a single Surface.blits call.
+    - Bodies smaller than a pixel are written straight into the pixels of the
+      surface (as points) instead of being blitted.
+    """
+
+    def __init__(self, width=WIDTH, height=HEIGHT, max_sprites=1024):
+        self.width = width
+        self.height = height
+        self.max_sprites = max_sprites
+        self.sprites = {} # (radius, r, g, b) -> sprite surface
+
+    def draw(self, surface, positions, radii, colors):
+        """
+        Draws the bodies with the given positions (N, 2), radii (N,) and colors (N, 3).
+        """
+
+        x = positions[:, 0]
+        y = positions[:, 1]
+        visible = (x + radii >= 0) & (x - radii < self.width) & (y + radii >= 0) & (y - radii < self.height)
+        if not visible.any():
+            return
+
+        x = x[visible]
+        y = y[visible]
+        colors = colors[visible]
+        sizes = np.rint(radii[visible]).astype(np.int64)
+        points = sizes < 1
+
+        if points.any():
+            self._draw_points(surface, x[points], y[points], colors[points])
+
+        circles = ~points
+        if circles.any():
+            self._draw_sprites(surface, x[circles], y[circles], sizes[circles], colors[circles])
+
+    def _draw_points(self, surface, x, y, colors):
+        """
+        Sets one pixel per body through a view of the surface pixels.
+        """
+
+        px = x.astype(np.int64)
+        py = y.astype(np.int64)
+        inside = (px >= 0) & (px < surface.get_width()) & (py >= 0) & (py < surface.get_height())
+
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[px[inside], py[inside]] = colors[inside]
+        del pixels # Unlocks the surface
+
+    def _draw_sprites(self, surface, x, y, sizes, colors):
+        """
+        Blits the cached sprite of every body, creating the missing ones.
+        """
+
+        colors = colors.astype(np.int64)
+        keys = (sizes << 24) | (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+
+        if len(self.sprites) + len(unique_keys) > self.max_sprites:
+            self.sprites.clear()
+
+        sprites = np.empty(len(unique_keys), dtype=object)
+        for i, key in enumerate(unique_keys.tolist()):
+            sprite = self.sprites.get(key)
+            if sprite is None:
+                color = ((key >> 16) & 255, (key >> 8) & 255, key & 255)
+                sprite = self.sprites[key] = make_circle_sprite(key >> 24, color)
+            sprites[i] = sprite
+
+        corners = np.column_stack((np.rint(x) - sizes, np.rint(y) - sizes)).astype(np.int64)
+        surface.blits(zip(sprites[inverse.ravel()], corners.tolist()), doreturn=False)
+
+
+def make_circle_sprite(radius, color):
+    """
+    Surface with a filled circle of the given radius and color on a transparent
+    (color keyed) background.
+    """
+
+    # Any key works as long as it is not the circle color
+    key = (0, 0, 0) if tuple(color) != (0, 0, 0) else (255, 255, 255)
+
+    sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+    sprite.fill(key)
+    pygame.draw.circle(sprite, color, (radius, radius), radius)
+    sprite.set_colorkey(key, pygame.RLEACCEL)
+    return sprite